@@ -0,0 +1,119 @@
+"""Provide a class for a set of recyclable canvas items.
+
+Copyright (c) Peter Triesberger
+For further information see https://github.com/peter88213/nv_matrix
+License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
+"""
+
+
+class CanvasItems:
+    """A set of canvas items of one kind, keyed by their logical position.
+
+    Each key is represented by a tuple of canvas item IDs.
+    When the required keys change, e.g. on scrolling, the items of
+    the keys that are no longer required are moved and reconfigured
+    for the new keys instead of being deleted and created anew.
+    If an ItemPool is given, items are parked in the pool instead of
+    being deleted, and taken from the pool instead of being created.
+    """
+
+    def __init__(self, canvas, create, place, pool=None, kind=None):
+        """Set up an empty item set.
+
+        Positional arguments:
+            canvas: tk.Canvas -- The canvas holding the items.
+            create -- Callback function create(key) that creates the
+                      items for a key and returns a tuple of item IDs.
+            place -- Callback function place(items, key) that moves and
+                     reconfigures existing items for a key.
+
+        Optional arguments:
+            pool: ItemPool -- Pool for parking the items.
+            kind: str -- Kind of the items in the pool.
+        """
+        self._canvas = canvas
+        self._create = create
+        self._place = place
+        self._pool = pool
+        self._kind = kind
+        self._items = {}
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+    def add(self, key):
+        """Create the items for a single key, if not existing."""
+        if not key in self._items:
+            self._items[key] = self._get_new_items(key)
+
+    def clear(self):
+        """Delete all items."""
+        for items in self._items.values():
+            self._delete(items)
+        self._items.clear()
+
+    def discard(self, key):
+        """Delete the items of a single key, if existing."""
+        items = self._items.pop(key, None)
+        if items is not None:
+            self._delete(items)
+
+    def get(self, key):
+        """Return the item IDs of a key, or None, if not existing."""
+        return self._items.get(key, None)
+
+    def pop(self, key):
+        """Remove a key and return its item IDs, keeping the items."""
+        return self._items.pop(key)
+
+    def put(self, key, items):
+        """Assign existing items to a key."""
+        self._items[key] = items
+
+    def update(self, keys):
+        """Make the items match the required keys.
+
+        Positional arguments:
+            keys: set -- The keys that require items.
+
+        Return True, if new items were created.
+        """
+        staleKeys = []
+        for key in self._items:
+            if not key in keys:
+                staleKeys.append(key)
+        created = False
+        for key in keys:
+            if key in self._items:
+                continue
+
+            if staleKeys:
+                items = self._items.pop(staleKeys.pop())
+                self._place(items, key)
+            else:
+                items = self._get_new_items(key)
+                created = True
+            self._items[key] = items
+        for key in staleKeys:
+            self._delete(self._items.pop(key))
+        return created
+
+    def _delete(self, items):
+        # Park the items, if possible; otherwise, delete them.
+        if self._pool is not None:
+            self._pool.park(self._kind, items)
+        else:
+            self._canvas.delete(*items)
+
+    def _get_new_items(self, key):
+        # Return items for a key, taking them from the pool, if possible.
+        if self._pool is not None:
+            items = self._pool.take(self._kind)
+            if items is not None:
+                self._place(items, key)
+                return items
+
+        return self._create(key)
@@ -0,0 +1,96 @@
+"""Provide a tooltip class for canvas items.
+
+Copyright (c) Peter Triesberger
+For further information see https://github.com/peter88213/nv_matrix
+License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
+"""
+import tkinter as tk
+
+
+class CanvasTooltip:
+    """A tooltip showing a text depending on the mouse position on canvases.
+
+    Instead of binding a hovertip to each widget, the canvas
+    coordinates are mapped to a cell, and the cell's text is
+    retrieved when the pointer rests on the cell.
+    One tooltip serves any number of canvases. Its window is
+    created when it is shown for the first time, and then reused.
+    """
+    HOVER_DELAY = 500
+
+    def __init__(self):
+        self._tooltip = None
+        self._label = None
+        self._tooltipJob = None
+        self._tooltipCanvas = None
+        self._tooltipCell = None
+
+    def add_canvas(self, canvas, getCell, getText):
+        """Bind the tooltip to a canvas.
+
+        Positional arguments:
+            canvas: tk.Canvas -- The canvas with the cells.
+            getCell -- Callback function getCell(x, y) returning a cell
+                       for canvas coordinates, or None.
+            getText -- Callback function getText(cell) returning
+                       the cell's tooltip text, or an empty string.
+        """
+        canvas.bind(
+            '<Motion>',
+            lambda event: self._on_motion(event, canvas, getCell, getText),
+        )
+        canvas.bind('<Leave>', self.hide)
+
+    def hide(self, event=None):
+        if self._tooltipJob is not None:
+            self._tooltipCanvas.after_cancel(self._tooltipJob)
+            self._tooltipJob = None
+        if self._tooltip is not None:
+            self._tooltip.withdraw()
+        self._tooltipCanvas = None
+        self._tooltipCell = None
+
+    def _on_motion(self, event, canvas, getCell, getText):
+        cell = getCell(
+            canvas.canvasx(event.x),
+            canvas.canvasy(event.y),
+        )
+        if canvas is self._tooltipCanvas and cell == self._tooltipCell:
+            return
+
+        self.hide()
+        if cell is None:
+            return
+
+        self._tooltipCanvas = canvas
+        self._tooltipCell = cell
+        self._tooltipJob = canvas.after(
+            self.HOVER_DELAY,
+            self._show,
+            getText,
+        )
+
+    def _show(self, getText):
+        # The text is retrieved only if the pointer rests on the cell.
+        self._tooltipJob = None
+        text = getText(self._tooltipCell)
+        if not text:
+            return
+
+        x = self._tooltipCanvas.winfo_pointerx() + 10
+        y = self._tooltipCanvas.winfo_pointery() + 10
+        if self._tooltip is None:
+            self._tooltip = tk.Toplevel(self._tooltipCanvas)
+            self._tooltip.wm_overrideredirect(True)
+            self._label = tk.Label(
+                self._tooltip,
+                justify='left',
+                background='#ffffe0',
+                relief='solid',
+                borderwidth=1,
+            )
+            self._label.pack()
+        self._label.configure(text=text)
+        self._tooltip.wm_geometry(f'+{x}+{y}')
+        self._tooltip.deiconify()
+        self._tooltip.lift()
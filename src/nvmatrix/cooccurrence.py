@@ -0,0 +1,157 @@
+"""Provide a class for counting the co-occurrences of elements.
+
+NumPy is used for the computation, if available.
+
+Copyright (c) Peter Triesberger
+For further information see https://github.com/peter88213/nv_matrix
+License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
+"""
+from nvlib.novx_globals import CR_ROOT
+from nvlib.novx_globals import IT_ROOT
+from nvlib.novx_globals import LC_ROOT
+from nvlib.novx_globals import PL_ROOT
+from nvmatrix.matrix_layout import iter_sections
+from nvmatrix.nvmatrix_globals import CHARACTERS
+from nvmatrix.nvmatrix_globals import ITEMS
+from nvmatrix.nvmatrix_globals import LOCATIONS
+from nvmatrix.nvmatrix_globals import PLOT_LINES
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class Cooccurrence:
+    """Co-occurrence counts of the elements in the "normal" sections.
+
+    The count for two elements is the number of sections
+    related to both of them.
+
+    Per category, the relations are held as an incidence matrix
+    of sections and elements. With NumPy, this is an array of zeros
+    and ones, and the counts are computed by matrix multiplication.
+    Otherwise, each element is represented by a packed bit row,
+    i.e. a Python integer with bit n set if the element is related
+    to the section n, and the counts are computed by ANDing the
+    bit rows and counting the bits.
+
+    The incidence matrices and the counts are cached until
+    invalidate() is called, e.g. after the relations have changed.
+    The class does not depend on tkinter.
+    """
+
+    def __init__(self, novel, useNumpy=True):
+        """Set up an empty cache.
+
+        Positional arguments:
+            novel: Novel -- Project reference.
+
+        Optional arguments:
+            useNumpy: Boolean -- If False, do not use NumPy,
+                                 even if it is available.
+        """
+        self._novel = novel
+        self.useNumpy = useNumpy and numpy is not None
+
+        # {category: (element IDs, incidence matrix)}
+        self._incidences = {}
+
+        # {(row category, column category): list of count rows}
+        self._counts = {}
+
+    def get_counts(self, rowCategory, columnCategory):
+        """Return a tuple (row element IDs, column element IDs, counts).
+
+        Positional arguments:
+            rowCategory: str -- Element category of the rows.
+            columnCategory: str -- Element category of the columns.
+
+        The counts are a list of rows,
+        each row being a list of integers.
+        The caller must not modify the result, since it is cached.
+        """
+        rowIds, rowIncidence = self._get_incidence(rowCategory)
+        columnIds, columnIncidence = self._get_incidence(columnCategory)
+        counts = self._counts.get((rowCategory, columnCategory), None)
+        if counts is None:
+            if self.useNumpy:
+                counts = (
+                    rowIncidence.T @ columnIncidence
+                ).astype(int).tolist()
+            elif rowCategory == columnCategory:
+                # The counts are symmetric; count each pair only once.
+                counts = []
+                for i, rowBits in enumerate(rowIncidence):
+                    countRow = []
+                    for j in range(i):
+                        countRow.append(counts[j][i])
+                    for columnBits in rowIncidence[i:]:
+                        countRow.append(bin(rowBits & columnBits).count('1'))
+                    counts.append(countRow)
+            else:
+                counts = []
+                for rowBits in rowIncidence:
+                    countRow = []
+                    for columnBits in columnIncidence:
+                        countRow.append(bin(rowBits & columnBits).count('1'))
+                    counts.append(countRow)
+            self._counts[rowCategory, columnCategory] = counts
+        return rowIds, columnIds, counts
+
+    def invalidate(self):
+        """Discard the cached results."""
+        self._incidences.clear()
+        self._counts.clear()
+
+    def _get_incidence(self, category):
+        # Return a tuple (element IDs, incidence matrix).
+        incidence = self._incidences.get(category, None)
+        if incidence is not None:
+            return incidence
+
+        if category == PLOT_LINES:
+            root = PL_ROOT
+        elif category == CHARACTERS:
+            root = CR_ROOT
+        elif category == LOCATIONS:
+            root = LC_ROOT
+        elif category == ITEMS:
+            root = IT_ROOT
+        elemIds = self._novel.tree.get_children(root)
+        columns = {}
+        for col, elemId in enumerate(elemIds):
+            columns[elemId] = col
+
+        # Collect the (section, element) index pairs.
+        sectionIndexes = []
+        elementIndexes = []
+        sectionCount = 0
+        for scId in iter_sections(self._novel):
+            section = self._novel.sections[scId]
+            if category == PLOT_LINES:
+                relatedIds = section.scPlotLines
+            elif category == CHARACTERS:
+                relatedIds = section.characters
+            elif category == LOCATIONS:
+                relatedIds = section.locations
+            elif category == ITEMS:
+                relatedIds = section.items
+            for elemId in relatedIds:
+                col = columns.get(elemId, None)
+                if col is not None:
+                    sectionIndexes.append(sectionCount)
+                    elementIndexes.append(col)
+            sectionCount += 1
+
+        if self.useNumpy:
+            # Floating point matrices are multiplied much faster
+            # than integer ones; the counts are still exact.
+            matrix = numpy.zeros((sectionCount, len(elemIds)))
+            matrix[sectionIndexes, elementIndexes] = 1
+        else:
+            matrix = [0] * len(elemIds)
+            for row, col in zip(sectionIndexes, elementIndexes):
+                matrix[col] |= 1 << row
+        incidence = self._incidences[category] = (list(elemIds), matrix)
+        return incidence
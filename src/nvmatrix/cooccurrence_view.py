@@ -0,0 +1,246 @@
+"""Provide a window displaying the co-occurrences of elements.
+
+Copyright (c) Peter Triesberger
+For further information see https://github.com/peter88213/nv_matrix
+License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
+"""
+from tkinter import ttk
+from tkinter.font import nametofont
+
+from nvmatrix.canvas_tooltip import CanvasTooltip
+from nvmatrix.heat_map import HeatMap
+from nvmatrix.nvmatrix_globals import CATEGORIES
+from nvmatrix.nvmatrix_globals import CHARACTERS
+from nvmatrix.nvmatrix_globals import ITEMS
+from nvmatrix.nvmatrix_globals import LOCATIONS
+from nvmatrix.nvmatrix_globals import PLOT_LINES
+from nvmatrix.nvmatrix_locale import _
+from nvmatrix.palette import Palette
+from nvmatrix.title_band import TitleBand
+from nvmatrix.widgets.table_frame import TableFrame
+import tkinter as tk
+
+
+class CooccurrenceView(tk.Toplevel):
+    """A window with the co-occurrence counts of two element categories.
+
+    The counts are displayed as a heat map on a virtual TableFrame,
+    with the elements of one category as rows, and the elements
+    of the other category as columns.
+    """
+
+    def __init__(self, master, novel, cooccurrence):
+        """Display the co-occurrences of the characters.
+
+        Positional arguments:
+            master: tk.Toplevel -- The matrix view.
+            novel: Novel -- Project reference.
+            cooccurrence: Cooccurrence -- The counts provider.
+        """
+        tk.Toplevel.__init__(self, master)
+        self.title(_('Co-occurrence'))
+        self._novel = novel
+        self._cooccurrence = cooccurrence
+        self._textWidths = {}
+        self._rowIds = []
+        self._columnIds = []
+        self.isOpen = True
+        self.protocol('WM_DELETE_WINDOW', self.on_quit)
+
+        #--- Category selection.
+        categoryTitles = (
+            _('Plot lines'),
+            _('Characters'),
+            _('Locations'),
+            _('Items'),
+        )
+        selectionFrame = ttk.Frame(self)
+        selectionFrame.pack(fill='x', pady=2)
+        ttk.Label(selectionFrame, text=_('Rows')).pack(side='left', padx=5)
+        self._rowCategoryBox = ttk.Combobox(
+            selectionFrame,
+            state='readonly',
+            values=categoryTitles,
+            width=15,
+        )
+        self._rowCategoryBox.current(CATEGORIES.index(CHARACTERS))
+        self._rowCategoryBox.pack(side='left')
+        self._rowCategoryBox.bind('<<ComboboxSelected>>', self.refresh)
+        ttk.Label(
+            selectionFrame,
+            text=_('Columns'),
+        ).pack(side='left', padx=5)
+        self._columnCategoryBox = ttk.Combobox(
+            selectionFrame,
+            state='readonly',
+            values=categoryTitles,
+            width=15,
+        )
+        self._columnCategoryBox.current(CATEGORIES.index(CHARACTERS))
+        self._columnCategoryBox.pack(side='left')
+        self._columnCategoryBox.bind('<<ComboboxSelected>>', self.refresh)
+
+        # "Close" button.
+        ttk.Button(
+            self,
+            text=_('Close'),
+            command=self.on_quit,
+        ).pack(side='bottom', anchor='e', padx=5, pady=5)
+
+        #--- The heat map and the title bands on a virtual table frame.
+        self._tableFrame = TableFrame(self, virtual=True)
+        self._tableFrame.pack(fill='both', expand=True, padx=2, pady=2)
+        self._palette = Palette(self)
+        topLeftLabel = tk.Label(
+            self._tableFrame.topLeft,
+            text=' ',
+            bg=self._palette.headerBackground[0],
+        )
+        topLeftLabel.pack(fill='x')
+        self._rowHeight = topLeftLabel.winfo_reqheight()
+        self._font = nametofont('TkDefaultFont')
+        self._heatMap = HeatMap(
+            self._tableFrame.display,
+            self._rowHeight,
+            self._palette.background[1][1],
+            self._palette.node,
+        )
+        self._rowTitleBand = TitleBand(self._tableFrame.rowTitles, True, 0)
+        self._columnTitleBand = TitleBand(
+            self._tableFrame.columnTitles,
+            False,
+            self._rowHeight,
+        )
+        tooltip = CanvasTooltip()
+        tooltip.add_canvas(
+            self._tableFrame.display,
+            self._heatMap.cell_at,
+            self._get_cell_text,
+        )
+        self._tableFrame.bind('<<ViewChanged>>', self.render)
+        self.refresh()
+
+    def on_quit(self, event=None):
+        self.isOpen = False
+        self._tableFrame.destroy()
+        self.destroy()
+
+    def refresh(self, event=None):
+        """Display the counts of the selected categories."""
+        rowCategory = CATEGORIES[self._rowCategoryBox.current()]
+        columnCategory = CATEGORIES[self._columnCategoryBox.current()]
+        self._rowIds, self._columnIds, counts = (
+            self._cooccurrence.get_counts(rowCategory, columnCategory)
+        )
+
+        #--- Column titles with the element colors.
+        self._columnTitleBand.reset()
+        columnWidths = []
+        x0 = 0
+        for col, elemId in enumerate(self._columnIds):
+            title, fgColor, bgColor = self._get_title(
+                columnCategory,
+                elemId,
+                self._palette.headerBackground[col % 2],
+            )
+            width = self._get_text_width(f' {title} ')
+            for countRow in counts:
+                width = max(width, self._get_text_width(f' {countRow[col]} '))
+            self._columnTitleBand.add_cell(
+                0,
+                x0,
+                x0 + width,
+                title,
+                fgColor,
+                bgColor,
+                anchor='center',
+            )
+            columnWidths.append(width)
+            x0 += width
+        self._heatMap.set_counts(counts, columnWidths)
+
+        #--- Row titles with the element colors.
+        self._rowTitleBand.reset()
+        rowTitleWidth = self._get_text_width(' ')
+        for row, elemId in enumerate(self._rowIds):
+            title, fgColor, bgColor = self._get_title(
+                rowCategory,
+                elemId,
+                self._palette.headerBackground[row % 2],
+            )
+            rowTitleWidth = max(rowTitleWidth, self._get_text_width(title))
+            self._rowTitleBand.add_cell(
+                0,
+                row * self._rowHeight,
+                (row + 1) * self._rowHeight,
+                title,
+                fgColor,
+                bgColor,
+            )
+        self._rowTitleBand.thickness = rowTitleWidth
+        self._tableFrame.set_extent(
+            rowTitleWidth,
+            self._rowHeight,
+            self._heatMap.width,
+            self._heatMap.height,
+        )
+
+    def render(self, event=None):
+        """Draw the visible part of the heat map."""
+        x0, y0, x1, y1 = self._tableFrame.get_viewport()
+        self._heatMap.render(x0, y0, x1, y1)
+        self._rowTitleBand.render(y0, y1)
+        self._columnTitleBand.render(x0, x1)
+
+    def _get_cell_text(self, cell):
+        # Return the tooltip text of a heat map cell.
+        row, col = cell
+        count = self._heatMap.get_count(row, col)
+        if not count:
+            return ''
+
+        rowCategory = CATEGORIES[self._rowCategoryBox.current()]
+        columnCategory = CATEGORIES[self._columnCategoryBox.current()]
+        rowElement = self._get_elements(rowCategory)[self._rowIds[row]]
+        columnElement = self._get_elements(columnCategory)[
+            self._columnIds[col]
+        ]
+        return (
+            f'{rowElement.title} / {columnElement.title}: '
+            f'{count} {_("Sections")}'
+        )
+
+    def _get_elements(self, category):
+        # Return the novel's element dictionary of a category.
+        if category == PLOT_LINES:
+            return self._novel.plotLines
+
+        if category == CHARACTERS:
+            return self._novel.characters
+
+        if category == LOCATIONS:
+            return self._novel.locations
+
+        if category == ITEMS:
+            return self._novel.items
+
+    def _get_text_width(self, text):
+        # Return the text width in pixels, measuring each text only once.
+        width = self._textWidths.get(text, None)
+        if width is None:
+            width = self._font.measure(text) + 2 * TitleBand.TEXT_PADDING
+            self._textWidths[text] = width
+        return width
+
+    def _get_title(self, category, elemId, defaultBg):
+        # Return a tuple (title, fgColor, bgColor) for an element.
+        element = self._get_elements(category)[elemId]
+        if category == PLOT_LINES:
+            title = element.shortName
+        else:
+            title = element.title
+        fgColor, bgColor, __ = self._palette.get_element_colors(
+            element.color,
+            defaultBg,
+        )
+        return title or '', fgColor, bgColor
@@ -0,0 +1,82 @@
+"""Provide a window displaying the metrics of the matrix operations.
+
+Copyright (c) Peter Triesberger
+For further information see https://github.com/peter88213/nv_matrix
+License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
+"""
+from tkinter import ttk
+
+from nvmatrix.instrumentation import instrumentation
+from nvmatrix.nvmatrix_locale import _
+import tkinter as tk
+
+
+class DiagnosticsDialog(tk.Toplevel):
+    """A window with the durations and counts of the matrix operations."""
+
+    def __init__(self, master, onUpdate=None):
+        """Display the current metrics.
+
+        Positional arguments:
+            master: tk.Toplevel -- The matrix view.
+
+        Optional arguments:
+            onUpdate -- Callback function called before the metrics
+                        are displayed, e.g. for counting the widgets.
+        """
+        tk.Toplevel.__init__(self, master)
+        self.title(_('Diagnostics'))
+        self._onUpdate = onUpdate
+        columns = ('calls', 'total', 'mean', 'maximum', 'last')
+        self._metricsView = ttk.Treeview(
+            self,
+            columns=columns,
+            height=12,
+        )
+        self._metricsView.heading('#0', text=_('Operation'))
+        self._metricsView.heading('calls', text=_('Calls'))
+        self._metricsView.heading('total', text=_('Total ms'))
+        self._metricsView.heading('mean', text=_('Mean ms'))
+        self._metricsView.heading('maximum', text=_('Maximum ms'))
+        self._metricsView.heading('last', text=_('Last ms'))
+        for column in columns:
+            self._metricsView.column(column, width=80, anchor='e')
+        self._metricsView.pack(fill='both', expand=True, padx=5, pady=5)
+        self._valuesLabel = ttk.Label(self, justify='left')
+        self._valuesLabel.pack(anchor='w', padx=5, pady=5)
+
+        ttk.Button(
+            self,
+            text=_('Close'),
+            command=self.destroy,
+        ).pack(side='right', padx=5, pady=5)
+        ttk.Button(
+            self,
+            text=_('Update'),
+            command=self.update_metrics,
+        ).pack(side='right', padx=5, pady=5)
+        self.update_metrics()
+
+    def update_metrics(self):
+        """Display the current metrics."""
+        if self._onUpdate is not None:
+            self._onUpdate()
+        self._metricsView.delete(*self._metricsView.get_children())
+        for operation in sorted(instrumentation.metrics):
+            calls, total, maximum, last = instrumentation.metrics[operation]
+            self._metricsView.insert(
+                '',
+                'end',
+                text=operation,
+                values=(
+                    calls,
+                    f'{total * 1000:.1f}',
+                    f'{total * 1000 / calls:.1f}',
+                    f'{maximum * 1000:.1f}',
+                    f'{last * 1000:.1f}',
+                ),
+            )
+        values = []
+        for name in sorted(instrumentation.values):
+            values.append(f'{name}: {instrumentation.values[name]}')
+        self._valuesLabel.configure(text='\n'.join(values))
@@ -0,0 +1,153 @@
+"""Provide a class for undoing and redoing relationship changes.
+
+Copyright (c) Peter Triesberger
+For further information see https://github.com/peter88213/nv_matrix
+License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
+"""
+from nvmatrix.nvmatrix_globals import CHARACTERS
+from nvmatrix.nvmatrix_globals import ITEMS
+from nvmatrix.nvmatrix_globals import LOCATIONS
+from nvmatrix.nvmatrix_globals import PLOT_LINES
+
+
+class EditLog:
+    """Undo and redo stacks of relationship changes.
+
+    Instead of snapshots, each entry holds the deltas of one edit.
+    A delta is a tuple:
+    (category, section ID, element ID, old state, new state,
+    IDs of the plot points disassociated from the section,
+    list indexes of the removed IDs)
+    The list indexes are a tuple (index of the element ID in the
+    section's list, index of the section ID in the plot line's list),
+    with None for IDs not removed.
+    Undoing an entry restores the old states in reverse order,
+    re-inserting the removed IDs at their former positions,
+    and associates the plot points again; redoing it applies
+    the new states again.
+    Changes whose sections, elements, or plot points have been
+    deleted in the meantime are skipped.
+
+    The log does not depend on tkinter.
+    """
+    MAX_ENTRIES = 200
+
+    def __init__(self, novel):
+        """Set up empty stacks.
+
+        Positional arguments:
+            novel: Novel -- Project reference.
+        """
+        self._novel = novel
+        self._undoEntries = []
+        self._redoEntries = []
+
+    def add(self, deltas):
+        """Add an entry with the deltas of one edit.
+
+        Positional arguments:
+            deltas: iterable -- Delta tuples in the order of change.
+
+        The redo stack is cleared.
+        """
+        deltas = tuple(deltas)
+        if not deltas:
+            return
+
+        self._undoEntries.append(deltas)
+        del self._undoEntries[:-self.MAX_ENTRIES]
+        self._redoEntries.clear()
+
+    def redo(self):
+        """Apply the last undone entry to the model again.
+
+        Return a set with the IDs of the modified sections.
+        Notifying the model's observers is up to the caller.
+        """
+        if not self._redoEntries:
+            return set()
+
+        deltas = self._redoEntries.pop()
+        self._undoEntries.append(deltas)
+        return self._apply(deltas, False)
+
+    def undo(self):
+        """Revert the last entry's changes in the model.
+
+        Return a set with the IDs of the modified sections.
+        Notifying the model's observers is up to the caller.
+        """
+        if not self._undoEntries:
+            return set()
+
+        deltas = self._undoEntries.pop()
+        self._redoEntries.append(deltas)
+        return self._apply(reversed(deltas), True)
+
+    def _apply(self, deltas, undo):
+        # Set the old states if undo is True, otherwise the new ones.
+        # Return a set with the IDs of the modified sections.
+        modifiedSections = set()
+        for delta in deltas:
+            category, scId, elemId, oldState, newState = delta[:5]
+            ppIds, indexes = delta[5:]
+            section = self._novel.sections.get(scId, None)
+            if section is None:
+                continue
+
+            if category == PLOT_LINES:
+                elements = self._novel.plotLines
+                elemIds = section.scPlotLines
+            elif category == CHARACTERS:
+                elements = self._novel.characters
+                elemIds = section.characters
+            elif category == LOCATIONS:
+                elements = self._novel.locations
+                elemIds = section.locations
+            elif category == ITEMS:
+                elements = self._novel.items
+                elemIds = section.items
+            if not elemId in elements:
+                continue
+
+            # The element ID lists are modified in place.
+            if undo:
+                state = oldState
+            else:
+                state = newState
+            if state and not elemId in elemIds:
+                self._insert(elemIds, elemId, indexes[0], undo)
+            elif not state and elemId in elemIds:
+                elemIds.remove(elemId)
+            modifiedSections.add(scId)
+            if category != PLOT_LINES:
+                continue
+
+            # Keep the plot line's cross references consistent.
+            plotlineSections = elements[elemId].sections
+            if state and not scId in plotlineSections:
+                self._insert(plotlineSections, scId, indexes[1], undo)
+            elif not state and scId in plotlineSections:
+                plotlineSections.remove(scId)
+            for ppId in ppIds:
+                plotPoint = self._novel.plotPoints.get(ppId, None)
+                if plotPoint is None:
+                    continue
+
+                if undo:
+                    if plotPoint.sectionAssoc is None:
+                        section.scPlotPoints[ppId] = elemId
+                        plotPoint.sectionAssoc = scId
+                elif section.scPlotPoints.get(ppId, None) == elemId:
+                    del section.scPlotPoints[ppId]
+                    plotPoint.sectionAssoc = None
+        return modifiedSections
+
+    @staticmethod
+    def _insert(ids, newId, index, undo):
+        # Insert an ID at its former position when undoing a removal,
+        # otherwise append it, as when the node was set.
+        if undo and index is not None:
+            ids.insert(min(index, len(ids)), newId)
+        else:
+            ids.append(newId)
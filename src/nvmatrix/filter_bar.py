@@ -0,0 +1,206 @@
+"""Provide a tkinter widget with the row filter settings.
+
+Copyright (c) Peter Triesberger
+For further information see https://github.com/peter88213/nv_matrix
+License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
+"""
+from tkinter import ttk
+
+from nvlib.novx_globals import CH_ROOT
+from nvlib.novx_globals import CR_ROOT
+from nvlib.novx_globals import IT_ROOT
+from nvlib.novx_globals import LC_ROOT
+from nvlib.novx_globals import PL_ROOT
+from nvmatrix.nvmatrix_locale import _
+import tkinter as tk
+
+
+class FilterBar(ttk.Frame):
+    """A bar with settings for filtering the matrix rows.
+
+    The sections can be filtered by chapter, by a substring
+    of the title, and by up to two related elements.
+    """
+    ELEMENT_BOXES = 2
+
+    def __init__(self, master, novel, onChange):
+        """Create the filter setting widgets.
+
+        Positional arguments:
+            master: tk.Toplevel -- The matrix view.
+            novel: Novel -- Project reference.
+            onChange -- Callback function called after
+                        a filter setting has been changed.
+        """
+        ttk.Frame.__init__(self, master)
+        self._novel = novel
+        self._onChange = onChange
+
+        # IDs in the order of the combobox choices; None means "all".
+        self._chapterIds = [None]
+        self._elementIds = [None]
+
+        # "Chapter" combobox.
+        ttk.Label(self, text=_('Chapter')).pack(side='left', padx=5)
+        self._chapterBox = ttk.Combobox(self, state='readonly', width=20)
+        self._chapterBox.pack(side='left')
+        self._chapterBox.bind('<<ComboboxSelected>>', self._on_change)
+
+        # "Title" entry.
+        ttk.Label(self, text=_('Title')).pack(side='left', padx=5)
+        self._titleText = tk.StringVar()
+        ttk.Entry(
+            self,
+            textvariable=self._titleText,
+            width=20,
+        ).pack(side='left')
+        self._titleText.trace_add('write', self._on_change)
+
+        # "Elements" comboboxes.
+        ttk.Label(self, text=_('Elements')).pack(side='left', padx=5)
+        self._elementBoxes = []
+        for __ in range(self.ELEMENT_BOXES):
+            elementBox = ttk.Combobox(self, state='readonly', width=20)
+            elementBox.pack(side='left', padx=(0, 5))
+            elementBox.bind('<<ComboboxSelected>>', self._on_change)
+            self._elementBoxes.append(elementBox)
+
+        # "Reset" button.
+        ttk.Button(
+            self,
+            text=_('Reset'),
+            command=self.reset,
+        ).pack(side='left', padx=5)
+
+        # Number of the sections displayed.
+        self._countLabel = ttk.Label(self)
+        self._countLabel.pack(side='right', padx=5)
+
+        self.update_choices()
+
+    @property
+    def isActive(self):
+        # True, if any filter setting is made.
+        chId, text, elemIds = self.get_filter()
+        return chId is not None or text != '' or elemIds != []
+
+    def get_filter(self):
+        """Return a tuple (chapter ID, title text, list of element IDs).
+
+        The chapter ID is None, if no chapter is selected.
+        """
+        elemIds = []
+        for elementBox in self._elementBoxes:
+            elemId = self._elementIds[elementBox.current()]
+            if elemId is not None and not elemId in elemIds:
+                elemIds.append(elemId)
+        return (
+            self._chapterIds[self._chapterBox.current()],
+            self._titleText.get(),
+            elemIds,
+        )
+
+    def reset(self):
+        """Clear all filter settings."""
+        self._chapterBox.current(0)
+        for elementBox in self._elementBoxes:
+            elementBox.current(0)
+
+        # Setting the text triggers the change callback.
+        if self._titleText.get():
+            self._titleText.set('')
+        else:
+            self._on_change()
+
+    def set_count(self, count):
+        """Display the number of the filtered sections.
+
+        Positional arguments:
+            count: int -- Number of sections, or None if not filtered.
+        """
+        if count is None:
+            self._countLabel.configure(text='')
+        else:
+            self._countLabel.configure(text=f'{_("Sections")}: {count}')
+
+    def set_filter(self, chId, text, elemIds):
+        """Make the filter settings.
+
+        Positional arguments:
+            chId: str -- ID of the chapter; None means all chapters.
+            text: str -- Substring of the section titles.
+            elemIds: list -- IDs of the related elements.
+
+        Chapters and elements that no longer exist are not selected.
+        """
+        if chId in self._chapterIds:
+            self._chapterBox.current(self._chapterIds.index(chId))
+        else:
+            self._chapterBox.current(0)
+        elemIds = list(elemIds)[:self.ELEMENT_BOXES]
+        elemIds.extend([None] * (self.ELEMENT_BOXES - len(elemIds)))
+        for elementBox, elemId in zip(self._elementBoxes, elemIds):
+            if elemId in self._elementIds:
+                elementBox.current(self._elementIds.index(elemId))
+            else:
+                elementBox.current(0)
+
+        # Setting the text triggers the change callback.
+        if self._titleText.get() != text:
+            self._titleText.set(text)
+        else:
+            self._on_change()
+
+    def update_choices(self):
+        """Update the chapters and elements to choose from.
+
+        Selected chapters and elements that no longer exist
+        are deselected.
+        """
+        chId = self._chapterIds[self._chapterBox.current()]
+        chapterTitles = ['']
+        self._chapterIds = [None]
+        for chapterId in self._novel.tree.get_children(CH_ROOT):
+            self._chapterIds.append(chapterId)
+            chapterTitles.append(self._novel.chapters[chapterId].title or '')
+        self._set_choices(
+            self._chapterBox,
+            chapterTitles,
+            self._chapterIds,
+            chId,
+        )
+
+        selectedIds = []
+        for elementBox in self._elementBoxes:
+            selectedIds.append(self._elementIds[elementBox.current()])
+        elementTitles = ['']
+        self._elementIds = [None]
+        for elements, root, categoryTitle in (
+            (self._novel.plotLines, PL_ROOT, _('Plot lines')),
+            (self._novel.characters, CR_ROOT, _('Characters')),
+            (self._novel.locations, LC_ROOT, _('Locations')),
+            (self._novel.items, IT_ROOT, _('Items')),
+        ):
+            for elemId in self._novel.tree.get_children(root):
+                self._elementIds.append(elemId)
+                elementTitles.append(
+                    f'{elements[elemId].title} ({categoryTitle})'
+                )
+        for elementBox, elemId in zip(self._elementBoxes, selectedIds):
+            self._set_choices(
+                elementBox,
+                elementTitles,
+                self._elementIds,
+                elemId,
+            )
+
+    def _on_change(self, *args):
+        self._onChange()
+
+    def _set_choices(self, comboBox, titles, ids, selectedId):
+        # Set the combobox values, keeping the selected ID, if any.
+        comboBox.configure(values=titles)
+        if selectedId in ids:
+            comboBox.current(ids.index(selectedId))
+        else:
+            comboBox.current(0)
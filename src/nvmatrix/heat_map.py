@@ -0,0 +1,177 @@
+"""Provide a class for a grid of counts drawn as a heat map on a canvas.
+
+Copyright (c) Peter Triesberger
+For further information see https://github.com/peter88213/nv_matrix
+License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
+"""
+from bisect import bisect_right
+
+from nvlib.model.hex_color import HexColor
+from nvmatrix.canvas_items import CanvasItems
+from nvmatrix.item_pool import ItemPool
+from nvmatrix.palette import Palette
+
+
+class HeatMap:
+    """A grid of counts, drawn as colored cells on a canvas.
+
+    The cell color is interpolated between a cold and a hot color
+    according to the count relative to the maximum count.
+    Cells with a count of zero are not drawn.
+    Like the node grid, only the visible cells are drawn,
+    and their items are recycled on scrolling.
+    """
+    OVERSCAN = 2
+
+    def __init__(self, canvas, rowHeight, coldColor, hotColor):
+        """Set up an empty heat map.
+
+        Positional arguments:
+            canvas: tk.Canvas -- The canvas to draw on.
+            rowHeight: int -- Row height in pixels.
+            coldColor: str -- Color of the lowest count, '#rrggbb'.
+            hotColor: str -- Color of the highest count, '#rrggbb'.
+        """
+        self._canvas = canvas
+        self.rowHeight = rowHeight
+        self._coldColor = self._to_rgb(coldColor)
+        self._hotColor = self._to_rgb(hotColor)
+        self._xOffsets = [0]
+        self._counts = []
+        self._maxCount = 0
+
+        # {count: (fgColor, bgColor)}
+        self._colors = {}
+
+        self._cells = CanvasItems(
+            canvas,
+            self._create_cell,
+            self._place_cell,
+            pool=ItemPool(canvas),
+            kind='heatCell',
+        )
+
+    @property
+    def width(self):
+        return self._xOffsets[-1]
+
+    @property
+    def height(self):
+        return len(self._counts) * self.rowHeight
+
+    def cell_at(self, x, y):
+        """Return a (row, column) tuple for the canvas coordinates x, y.
+
+        Return None, if there is no cell at this position.
+        """
+        if x < 0 or y < 0:
+            return None
+
+        col = bisect_right(self._xOffsets, x) - 1
+        row = int(y // self.rowHeight)
+        if col >= len(self._xOffsets) - 1 or row >= len(self._counts):
+            return None
+
+        return row, col
+
+    def get_count(self, row, col):
+        return self._counts[row][col]
+
+    def render(self, x0, y0, x1, y1):
+        """Draw the cells within the canvas area x0, y0, x1, y1."""
+        firstCol = max(bisect_right(self._xOffsets, x0) - 1 - self.OVERSCAN, 0)
+        lastCol = min(
+            bisect_right(self._xOffsets, x1) + self.OVERSCAN,
+            len(self._xOffsets) - 1,
+        )
+        firstRow = max(int(y0 // self.rowHeight) - self.OVERSCAN, 0)
+        lastRow = min(
+            int(y1 // self.rowHeight) + 1 + self.OVERSCAN,
+            len(self._counts),
+        )
+        cells = set()
+        for row in range(firstRow, lastRow):
+            countRow = self._counts[row]
+            for col in range(firstCol, lastCol):
+                if countRow[col]:
+                    cells.add((row, col))
+        self._cells.update(cells)
+
+    def set_counts(self, counts, columnWidths):
+        """Set the counts to display, and park the existing cell items.
+
+        Positional arguments:
+            counts: list -- Rows of counts; each row is a list of integers.
+            columnWidths: list -- Column widths in pixels.
+        """
+        self._cells.clear()
+        self._counts = counts
+        self._xOffsets = [0]
+        for width in columnWidths:
+            self._xOffsets.append(self._xOffsets[-1] + width)
+        self._maxCount = 0
+        for countRow in counts:
+            self._maxCount = max(self._maxCount, max(countRow, default=0))
+        self._colors.clear()
+
+    def _create_cell(self, cell):
+        x0, y0, x1, y1 = self._get_cell_coords(cell)
+        count = self._counts[cell[0]][cell[1]]
+        fgColor, bgColor = self._get_colors(count)
+        rect = self._canvas.create_rectangle(
+            x0, y0, x1, y1,
+            fill=bgColor,
+            width=0,
+            tags='heatCell',
+        )
+        text = self._canvas.create_text(
+            (x0 + x1) // 2, (y0 + y1) // 2,
+            text=count,
+            fill=fgColor,
+            tags='heatCell',
+        )
+        return rect, text
+
+    def _get_cell_coords(self, cell):
+        row, col = cell
+        return (
+            self._xOffsets[col],
+            row * self.rowHeight,
+            self._xOffsets[col + 1],
+            (row + 1) * self.rowHeight,
+        )
+
+    def _get_colors(self, count):
+        # Return a (fgColor, bgColor) tuple for a count.
+        colors = self._colors.get(count, None)
+        if colors is None:
+            ratio = count / self._maxCount
+            rgb = []
+            for cold, hot in zip(self._coldColor, self._hotColor):
+                rgb.append(round(cold + (hot - cold) * ratio))
+            bgColor = '#%02x%02x%02x' % tuple(rgb)
+            if HexColor.is_dark(bgColor):
+                fgColor = Palette.WHITE
+            else:
+                fgColor = Palette.BLACK
+            colors = self._colors[count] = (fgColor, bgColor)
+        return colors
+
+    def _place_cell(self, items, cell):
+        rect, text = items
+        x0, y0, x1, y1 = self._get_cell_coords(cell)
+        count = self._counts[cell[0]][cell[1]]
+        fgColor, bgColor = self._get_colors(count)
+        self._canvas.coords(rect, x0, y0, x1, y1)
+        self._canvas.itemconfigure(rect, fill=bgColor)
+        self._canvas.coords(text, (x0 + x1) // 2, (y0 + y1) // 2)
+        self._canvas.itemconfigure(text, text=count, fill=fgColor)
+
+    @staticmethod
+    def _to_rgb(color):
+        # Return a (red, green, blue) tuple for a '#rrggbb' color.
+        return (
+            int(color[1:3], 16),
+            int(color[3:5], 16),
+            int(color[5:7], 16),
+        )
@@ -0,0 +1,138 @@
+"""Provide a class for optional timing of the matrix operations.
+
+Copyright (c) Peter Triesberger
+For further information see https://github.com/peter88213/nv_matrix
+License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
+"""
+import cProfile
+from functools import wraps
+import logging
+from logging.handlers import RotatingFileHandler
+import os
+import time
+
+
+class Instrumentation:
+    """Durations and counts of the matrix operations.
+
+    Methods decorated with timed() are measured, if enabled.
+    Each call is written to a rolling log file. Optionally, the
+    calls are profiled, and the cumulated profile of each operation
+    is saved as a .pstats file.
+    When disabled, a decorated method costs one flag check per call.
+
+    Public instance variables:
+        isEnabled: Boolean -- True, if the operations are measured.
+        metrics: dict -- {operation: [calls, total s, maximum s, last s]}
+        values: dict -- {name: value} of counted things, e.g. widgets.
+    """
+    ENV_VARIABLE = 'NVMATRIX_INSTRUMENTATION'
+    # Set it to "1" to enable, or to "profile" to enable with profiling.
+
+    LOG_FILENAME = 'matrix.log'
+    LOG_SIZE = 500000
+    LOG_BACKUPS = 2
+    PROFILE_DIRNAME = 'matrix_profiles'
+
+    def __init__(self):
+        self.isEnabled = False
+        self.metrics = {}
+        self.values = {}
+        self._logger = None
+        self._profileDir = None
+        self._profiles = {}
+        self._depth = 0
+
+    def enable(self, logDir, profile=False):
+        """Start measuring, logging to a file in logDir.
+
+        Optional arguments:
+            profile: Boolean -- If True, also profile the operations.
+        """
+        os.makedirs(logDir, exist_ok=True)
+        if self._logger is None:
+            self._logger = logging.getLogger('nvmatrix')
+            self._logger.setLevel(logging.INFO)
+            self._logger.propagate = False
+            handler = RotatingFileHandler(
+                f'{logDir}/{self.LOG_FILENAME}',
+                maxBytes=self.LOG_SIZE,
+                backupCount=self.LOG_BACKUPS,
+                encoding='utf-8',
+            )
+            handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+            self._logger.addHandler(handler)
+        if profile:
+            self._profileDir = f'{logDir}/{self.PROFILE_DIRNAME}'
+        self.isEnabled = True
+
+    def record(self, operation, seconds):
+        """Add the duration of an operation's call to the metrics."""
+        metric = self.metrics.get(operation, None)
+        if metric is None:
+            self.metrics[operation] = [1, seconds, seconds, seconds]
+        else:
+            metric[0] += 1
+            metric[1] += seconds
+            metric[2] = max(metric[2], seconds)
+            metric[3] = seconds
+        self._logger.info(f'{operation} {seconds * 1000:.1f} ms')
+
+    def save_profiles(self):
+        """Write the cumulated profile of each operation to a file."""
+        if not self._profiles:
+            return
+
+        os.makedirs(self._profileDir, exist_ok=True)
+        for operation, profile in self._profiles.items():
+            profile.dump_stats(f'{self._profileDir}/{operation}.pstats')
+
+    def set_value(self, name, value):
+        """Record the current value of a counted thing."""
+        if self.isEnabled:
+            self.values[name] = value
+            self._logger.info(f'{name} {value}')
+
+    def timed(self, operation):
+        """Return a decorator that measures the calls of a method.
+
+        Positional arguments:
+            operation: str -- Name of the operation in the metrics.
+        """
+
+        def decorator(method):
+
+            @wraps(method)
+            def wrapper(*args, **kwargs):
+                if not self.isEnabled:
+                    return method(*args, **kwargs)
+
+                return self._call(operation, method, args, kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def _call(self, operation, method, args, kwargs):
+        # Call the method, measuring its duration.
+        # Only the outermost of nested operations is profiled.
+        profile = None
+        if self._profileDir is not None and self._depth == 0:
+            profile = self._profiles.get(operation, None)
+            if profile is None:
+                profile = self._profiles[operation] = cProfile.Profile()
+            profile.enable()
+        self._depth += 1
+        startTime = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+
+        finally:
+            seconds = time.perf_counter() - startTime
+            self._depth -= 1
+            if profile is not None:
+                profile.disable()
+            self.record(operation, seconds)
+
+
+instrumentation = Instrumentation()
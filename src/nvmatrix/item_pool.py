@@ -0,0 +1,92 @@
+"""Provide a class for a pool of reusable canvas items.
+
+Copyright (c) Peter Triesberger
+For further information see https://github.com/peter88213/nv_matrix
+License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
+"""
+from collections import OrderedDict
+
+
+class ItemPool:
+    """A pool of hidden canvas items, parked for reuse.
+
+    Canvas items that are no longer required, e.g. after a layout
+    change, are hidden and parked in the pool instead of being deleted.
+    Items of the same kind are taken from the pool instead of being
+    created anew.
+    The pool has a capacity; if it is exceeded, the least recently
+    parked items are deleted.
+    """
+    CAPACITY = 2000
+
+    def __init__(self, canvas, capacity=CAPACITY):
+        """Set up an empty pool.
+
+        Positional arguments:
+            canvas: tk.Canvas -- The canvas holding the items.
+
+        Optional arguments:
+            capacity: int -- Maximum number of parked item tuples.
+        """
+        self._canvas = canvas
+        self.capacity = capacity
+
+        # Parked item tuples in the order of parking:
+        # {item IDs: kind}, and per kind {item IDs: None}.
+        self._parked = OrderedDict()
+        self._parkedByKind = {}
+
+    def __len__(self):
+        return len(self._parked)
+
+    def park(self, kind, items, script=None):
+        """Hide a tuple of items and keep it for reuse.
+
+        Positional arguments:
+            kind: str -- The kind of items, e.g. their tag.
+            items: tuple -- Canvas item IDs.
+
+        Optional arguments:
+            script: list -- If given, the Tcl commands are appended
+                            to the list instead of being called.
+        """
+        for item in items:
+            self._configure(item, 'hidden', script)
+        self._parked[items] = kind
+        self._parkedByKind.setdefault(kind, OrderedDict())[items] = None
+        while len(self._parked) > self.capacity:
+            items, kind = self._parked.popitem(last=False)
+            del self._parkedByKind[kind][items]
+            if script is None:
+                self._canvas.delete(*items)
+            else:
+                script.append(
+                    f'{self._canvas} delete {" ".join(map(str, items))}'
+                )
+
+    def take(self, kind, script=None):
+        """Return a tuple of parked items of a kind, or None.
+
+        The items are shown again; the caller must place them.
+
+        Optional arguments:
+            script: list -- If given, the Tcl commands are appended
+                            to the list instead of being called.
+        """
+        parked = self._parkedByKind.get(kind, None)
+        if not parked:
+            return None
+
+        items, __ = parked.popitem()
+        del self._parked[items]
+        for item in items:
+            self._configure(item, 'normal', script)
+        return items
+
+    def _configure(self, item, state, script):
+        if script is None:
+            self._canvas.itemconfigure(item, state=state)
+        else:
+            script.append(
+                f'{self._canvas} itemconfigure {item} -state {state}'
+            )
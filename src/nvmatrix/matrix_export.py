@@ -0,0 +1,175 @@
+"""Provide a function exporting the relationship matrix to a file.
+
+The relations are read from the novel and written row by row,
+without building widgets; the memory used does not depend on
+the number of sections.
+
+Copyright (c) Peter Triesberger
+For further information see https://github.com/peter88213/nv_matrix
+License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
+"""
+import csv
+from html import escape
+import os
+
+from nvlib.model.hex_color import HexColor
+from nvmatrix.matrix_layout import get_categories
+from nvmatrix.matrix_layout import iter_sections
+from nvmatrix.node import Node
+from nvmatrix.nvmatrix_globals import CHARACTERS
+from nvmatrix.nvmatrix_globals import ITEMS
+from nvmatrix.nvmatrix_globals import LOCATIONS
+from nvmatrix.nvmatrix_globals import PLOT_LINES
+from nvmatrix.nvmatrix_locale import _
+
+EXPORT_FORMATS = {
+    '.csv': 'csv',
+    '.tsv': 'tsv',
+    '.txt': 'tsv',
+    '.html': 'html',
+    '.htm': 'html',
+}
+CSV_MARKER = 'x'
+HTML_STYLE = '''table {border-collapse: collapse; font-family: sans-serif;}
+th, td {border: 1px solid #b2b2b2; padding: 2px 4px;}
+thead th {background: #e6e6e6;}
+tbody th {text-align: left; font-weight: normal; white-space: nowrap;}
+tbody td {text-align: center;}
+tbody tr:nth-child(even) {background: #f2f2f2;}'''
+
+
+def export_matrix(novel, filePath, fileFormat=None):
+    """Write the relationship matrix to a file.
+
+    Positional arguments:
+        novel: Novel -- Project reference.
+        filePath: str -- Path of the file to write.
+
+    Optional arguments:
+        fileFormat: str -- 'csv', 'tsv', or 'html'.
+                           By default, the format is derived
+                           from the file extension.
+
+    The rows and columns are selected like in the matrix view.
+    Return the number of exported sections.
+    Raise ValueError, if the format is not supported.
+    """
+    if fileFormat is None:
+        extension = os.path.splitext(filePath)[1].lower()
+        fileFormat = EXPORT_FORMATS.get(extension, None)
+    if not fileFormat in EXPORT_FORMATS.values():
+        raise ValueError(f'{_("File type is not supported")}: "{filePath}"')
+
+    categories = get_categories(novel)
+    if fileFormat == 'html':
+        with open(filePath, 'w', encoding='utf-8') as f:
+            return _write_html(f, novel, categories)
+
+    if fileFormat == 'tsv':
+        delimiter = '\t'
+    else:
+        delimiter = ','
+    with open(filePath, 'w', encoding='utf-8', newline='') as f:
+        return _write_csv(f, novel, categories, delimiter)
+
+
+def _get_row_relations(section):
+    # Return a dictionary with a membership index per category.
+    return {
+        PLOT_LINES: dict.fromkeys(section.scPlotLines),
+        CHARACTERS: dict.fromkeys(section.characters),
+        LOCATIONS: dict.fromkeys(section.locations),
+        ITEMS: dict.fromkeys(section.items),
+    }
+
+
+def _iter_rows(novel, categories):
+    # Iterate over the sections as (section, list of related flags).
+    columns = []
+    for category, __, __, columnSpecs in categories:
+        for elemId, __, __ in columnSpecs:
+            columns.append((category, elemId))
+    for scId in iter_sections(novel):
+        section = novel.sections[scId]
+        relations = _get_row_relations(section)
+        flags = []
+        for category, elemId in columns:
+            flags.append(elemId in relations[category])
+        yield section, flags
+
+
+def _write_csv(f, novel, categories, delimiter):
+    # Write a header row with the element titles,
+    # and a row per section with a marker per relation.
+    writer = csv.writer(f, delimiter=delimiter)
+    header = [_('Sections')]
+    for __, __, __, columnSpecs in categories:
+        for __, title, __ in columnSpecs:
+            header.append(title)
+    writer.writerow(header)
+    count = 0
+    for section, flags in _iter_rows(novel, categories):
+        row = [section.title]
+        for flag in flags:
+            if flag:
+                row.append(CSV_MARKER)
+            else:
+                row.append('')
+        writer.writerow(row)
+        count += 1
+    return count
+
+
+def _write_html(f, novel, categories):
+    # Write a self-contained HTML page with the matrix as a table.
+    # The element colors are applied to the titles and markers.
+    title = escape(f'{novel.title} - {_("Relationship matrix")}')
+    f.write(
+        '<!DOCTYPE html>\n'
+        '<html>\n<head>\n<meta charset="utf-8">\n'
+        f'<title>{title}</title>\n'
+        f'<style>\n{HTML_STYLE}\n</style>\n'
+        '</head>\n<body>\n<table>\n<thead>\n'
+        f'<tr><th rowspan="2">{escape(_("Sections"))}</th>'
+    )
+    for __, categoryTitle, __, columnSpecs in categories:
+        if columnSpecs:
+            f.write(
+                f'<th colspan="{len(columnSpecs)}">'
+                f'{escape(categoryTitle)}</th>'
+            )
+    f.write('</tr>\n<tr>')
+    cells = []
+    for __, __, elements, columnSpecs in categories:
+        for elemId, elemTitle, hoverText in columnSpecs:
+            color = elements[elemId].color
+            if color is None:
+                style = ''
+                cells.append(f'<td>{Node.marker}</td>')
+            else:
+                if HexColor.is_dark(color):
+                    fgColor = '#ffffff'
+                else:
+                    fgColor = '#000000'
+                style = f' style="background: {color}; color: {fgColor};"'
+                cells.append(
+                    f'<td style="color: {color};">{Node.marker}</td>'
+                )
+            f.write(
+                f'<th title="{escape(hoverText or "")}"{style}>'
+                f'{escape(elemTitle or "")}</th>'
+            )
+    f.write('</tr>\n</thead>\n<tbody>\n')
+    count = 0
+    for section, flags in _iter_rows(novel, categories):
+        row = [f'<tr><th>{escape(section.title or "")}</th>']
+        for col, flag in enumerate(flags):
+            if flag:
+                row.append(cells[col])
+            else:
+                row.append('<td></td>')
+        row.append('</tr>\n')
+        f.write(''.join(row))
+        count += 1
+    f.write('</tbody>\n</table>\n</body>\n</html>\n')
+    return count
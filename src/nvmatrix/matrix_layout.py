@@ -0,0 +1,146 @@
+"""Provide functions selecting the rows and columns of the matrix.
+
+The rows are the "normal" sections; the columns are the elements
+of the categories displayed according to the settings.
+The functions do not depend on tkinter, so the selection is the same
+for the relations table and the export.
+
+Copyright (c) Peter Triesberger
+For further information see https://github.com/peter88213/nv_matrix
+License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
+"""
+from nvlib.novx_globals import CH_ROOT
+from nvlib.novx_globals import CR_ROOT
+from nvlib.novx_globals import IT_ROOT
+from nvlib.novx_globals import LC_ROOT
+from nvlib.novx_globals import PL_ROOT
+from nvmatrix.nvmatrix_globals import CATEGORIES
+from nvmatrix.nvmatrix_globals import CHARACTERS
+from nvmatrix.nvmatrix_globals import ITEMS
+from nvmatrix.nvmatrix_globals import LOCATIONS
+from nvmatrix.nvmatrix_globals import PLOT_LINES
+from nvmatrix.nvmatrix_globals import prefs
+from nvmatrix.nvmatrix_locale import _
+
+
+def get_categories(novel):
+    """Return a list of the displayed element categories.
+
+    Each category is specified as described for get_category().
+    """
+    categories = []
+    for category in CATEGORIES:
+        categorySpec = get_category(novel, category)
+        if categorySpec is not None:
+            categories.append(categorySpec)
+    return categories
+
+
+def get_category(novel, category):
+    """Return a tuple (category, title, elements, list of column specs).
+
+    Positional arguments:
+        novel: Novel -- Project reference.
+        category: str -- Element category, e.g. CHARACTERS.
+
+    A column spec is a tuple (element ID, title, hover text).
+    Return None, if the category is not displayed.
+    """
+
+    #--- Plot line columns.
+    if category == PLOT_LINES:
+        if not (novel.plotLines and prefs['show_plot_lines']):
+            return None
+
+        columnSpecs = []
+        for plId in novel.tree.get_children(PL_ROOT):
+            columnSpecs.append((
+                plId,
+                novel.plotLines[plId].shortName,
+                novel.plotLines[plId].title,
+            ))
+        return (
+            PLOT_LINES,
+            _('Plot lines'),
+            novel.plotLines,
+            columnSpecs,
+        )
+
+    #--- Character columns.
+    if category == CHARACTERS:
+        if not (novel.characters and prefs['show_characters']):
+            return None
+
+        columnSpecs = []
+        for crId in novel.tree.get_children(CR_ROOT):
+            if (
+                prefs['major_characters_only']
+                and not novel.characters[crId].isMajor
+            ):
+                continue
+
+            hoverText = novel.characters[crId].fullName
+            if novel.characters[crId].aka:
+                hoverText = (
+                    f'{hoverText}\n'
+                    f'({novel.characters[crId].aka})'
+                )
+            columnSpecs.append((
+                crId,
+                novel.characters[crId].title,
+                hoverText,
+            ))
+        return (
+            CHARACTERS,
+            _('Characters'),
+            novel.characters,
+            columnSpecs,
+        )
+
+    #--- Location columns.
+    if category == LOCATIONS:
+        if not (novel.locations and prefs['show_locations']):
+            return None
+
+        columnSpecs = []
+        for lcId in novel.tree.get_children(LC_ROOT):
+            columnSpecs.append((
+                lcId,
+                novel.locations[lcId].title,
+                '',
+            ))
+        return (
+            LOCATIONS,
+            _('Locations'),
+            novel.locations,
+            columnSpecs,
+        )
+
+    #--- Item columns.
+    if category == ITEMS:
+        if not (novel.items and prefs['show_items']):
+            return None
+
+        columnSpecs = []
+        for itId in novel.tree.get_children(IT_ROOT):
+            columnSpecs.append((
+                itId,
+                novel.items[itId].title,
+                '',
+            ))
+        return (
+            ITEMS,
+            _('Items'),
+            novel.items,
+            columnSpecs,
+        )
+
+    return None
+
+
+def iter_sections(novel):
+    """Iterate over the IDs of the "normal" sections, in tree order."""
+    for chId in novel.tree.get_children(CH_ROOT):
+        for scId in novel.tree.get_children(chId):
+            if novel.sections[scId].scType == 0:
+                yield scId
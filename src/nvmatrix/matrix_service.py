@@ -4,17 +4,21 @@ Copyright (c) Peter Triesberger
 For further information see https://github.com/peter88213/nv_matrix
 License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
 """
+import os
 from pathlib import Path
 
 from nvlib.controller.sub_controller import SubController
 from nvlib.gui.set_icon_tk import set_icon
+from nvmatrix.instrumentation import instrumentation
 from nvmatrix.matrix_view import MatrixView
 from nvmatrix.nvmatrix_globals import prefs
+from nvmatrix.view_states import ViewStates
 
 
 class MatrixService(SubController):
     INI_FILENAME = 'matrix.ini'
     INI_FILEPATH = '.novx/config'
+    VIEW_STATES_FILENAME = 'matrix_views.json'
     SETTINGS = dict(
         window_geometry='600x800',
         color_bg_00='gray80',
@@ -31,6 +35,9 @@ class MatrixService(SubController):
         show_locations=False,
         show_items=True,
         major_characters_only=False,
+        aggregate_chapters=False,
+        instrumentation=False,
+        instrumentation_profiles=False,
     )
 
     def __init__(self, model, view, controller):
@@ -54,6 +61,22 @@ class MatrixService(SubController):
         prefs.update(self.configuration.settings)
         prefs.update(self.configuration.options)
 
+        #--- The view states are cached next to the configuration.
+        self._viewStates = ViewStates(
+            f'{configDir}/{self.VIEW_STATES_FILENAME}'
+        )
+
+        #--- Measure the matrix operations, if requested.
+        envSetting = os.environ.get(instrumentation.ENV_VARIABLE, '0')
+        if prefs['instrumentation'] or envSetting != '0':
+            instrumentation.enable(
+                configDir,
+                profile=(
+                    prefs['instrumentation_profiles']
+                    or envSetting == 'profile'
+                ),
+            )
+
     def lock(self):
         """Inhibit changes on the model.
         
@@ -109,6 +132,7 @@ class MatrixService(SubController):
         self._matrixViewer = MatrixView(
             self._mdl,
             self._ctrl,
+            viewStates=self._viewStates,
         )
         self._matrixViewer.title(f'{self._mdl.novel.title} - {windowTitle}')
         set_icon(self._matrixViewer, icon='matrix', default=False)
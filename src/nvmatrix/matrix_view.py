@@ -4,30 +4,70 @@ Copyright (c) Peter Triesberger
 For further information see https://github.com/peter88213/nv_matrix
 License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
 """
+from tkinter import filedialog
+from tkinter import messagebox
 from tkinter import ttk
 
 from nvlib.controller.sub_controller import SubController
 from nvlib.gui.observer import Observer
+from nvmatrix.cooccurrence import Cooccurrence
+from nvmatrix.cooccurrence_view import CooccurrenceView
+from nvmatrix.diagnostics_dialog import DiagnosticsDialog
+from nvmatrix.edit_log import EditLog
+from nvmatrix.filter_bar import FilterBar
+from nvmatrix.instrumentation import instrumentation
+from nvmatrix.matrix_export import export_matrix
 from nvmatrix.node import Node
+from nvmatrix.nvmatrix_globals import CHARACTERS
 from nvmatrix.nvmatrix_globals import HELP_PAGE
+from nvmatrix.nvmatrix_globals import ITEMS
+from nvmatrix.nvmatrix_globals import LOCATIONS
+from nvmatrix.nvmatrix_globals import PLOT_LINES
 from nvmatrix.nvmatrix_globals import prefs
 from nvmatrix.nvmatrix_locale import _
 from nvmatrix.platform.platform_settings import KEYS
 from nvmatrix.platform.platform_settings import MOUSE
 from nvmatrix.platform.platform_settings import PLATFORM
 from nvmatrix.relations_table import RelationsTable
+from nvmatrix.section_index import SectionIndex
+from nvmatrix.view_states import ViewStates
 from nvmatrix.widgets.table_frame import TableFrame
 import tkinter as tk
 
 
 class MatrixView(tk.Toplevel, Observer, SubController):
+    WRITE_BACK_DELAY = 300
+    # Milliseconds to wait for further node changes
+    # before writing them back to the model.
 
-    def __init__(self, model, controller):
+    @instrumentation.timed('open')
+    def __init__(self, model, controller, viewStates=None):
         tk.Toplevel.__init__(self)
 
         self._mdl = model
         self._ctrl = controller
 
+        # The view state of the last session, if still valid.
+        self._viewStates = viewStates
+        viewState = self._get_view_state()
+
+        # Node changes waiting for the write-back.
+        self._pendingNodes = {}
+        self._writeBackJob = None
+
+        # Displayed while the nodes are set progressively.
+        self._progressBar = None
+
+        # Built when the rows are filtered or aggregated for the first time.
+        self._sectionIndex = None
+
+        # Relationship changes to undo and redo.
+        self._editLog = EditLog(self._mdl.novel)
+
+        # Element co-occurrence counts, computed on demand.
+        self._cooccurrence = Cooccurrence(self._mdl.novel)
+        self._cooccurrenceView = None
+
         self.isOpen = True
         if self._ctrl.isLocked:
             self.lock()
@@ -48,21 +88,60 @@ class MatrixView(tk.Toplevel, Observer, SubController):
         #--- Main window and table frame.
         self.mainWindow = ttk.Frame(self)
         self.mainWindow.pack(fill='both', expand=True)
-        self.tableFrame = TableFrame(self.mainWindow)
+        self.tableFrame = TableFrame(self.mainWindow, virtual=True)
 
         #--- The Relations Table.
         if self._mdl.novel is not None:
             self._relationsTable = RelationsTable(
                 self.tableFrame,
                 self._mdl.novel,
-                self._mdl.nvService.new_hovertip,
+                onToggle=self._on_element_change,
+                onExpand=self._expand_chapter,
+                layoutCache=viewState.get('layout', None),
+            )
+            if prefs['aggregate_chapters']:
+                self._relationsTable.aggregate_chapters(
+                    self._get_section_index()
+                )
+            self._relationsTable.set_nodes(onProgress=self._show_progress)
+
+            #--- Context menu for the selected nodes.
+            self._selectionMenu = tk.Menu(self, tearoff=0)
+            self._selectionMenu.add_command(
+                label=_('Set'),
+                command=lambda: self._change_selection('set'),
+            )
+            self._selectionMenu.add_command(
+                label=_('Clear'),
+                command=lambda: self._change_selection('clear'),
+            )
+            self._selectionMenu.add_command(
+                label=_('Invert'),
+                command=lambda: self._change_selection('invert'),
+            )
+            self.tableFrame.display.bind(
+                MOUSE.OPEN_CONTEXT_MENU,
+                self._open_selection_menu,
+            )
+            self.bind(KEYS.UNDO[0], self._undo)
+            self.bind(KEYS.REDO[0], self._redo)
+
+            #--- The filter bar above the table.
+            self._filterBar = FilterBar(
+                self,
+                self._mdl.novel,
+                self._apply_filter,
             )
-            self._relationsTable.set_nodes()
+            self._filterBar.pack(fill='x', pady=2, before=self.mainWindow)
+            if 'filter' in viewState:
+                self._filterBar.set_filter(*viewState['filter'])
         self.tableFrame.pack(fill='both', expand=True, padx=2, pady=2)
+        if 'scroll' in viewState:
+            # Scroll when the table frame is laid out.
+            self.after_idle(self.tableFrame.scroll_to, *viewState['scroll'])
 
         #--- Initialize the view update mechanism.
         self._skipUpdate = False
-        self.bind(MOUSE.TOGGLE_STATE, self._on_element_change)
 
         # "Show plot lines" checkbox.
         self._showPlotlines = tk.BooleanVar(
@@ -129,6 +208,19 @@ class MatrixView(tk.Toplevel, Observer, SubController):
             command=self._change_major_characters_only,
         ).pack(side='left', padx=5, pady=5)
 
+        # "Chapters" checkbox.
+        self._aggregateChapters = tk.BooleanVar(
+            value=prefs['aggregate_chapters'],
+        )
+        ttk.Checkbutton(
+            self,
+            text=_('Chapters'),
+            variable=self._aggregateChapters,
+            onvalue=True,
+            offvalue=False,
+            command=self._change_aggregate_chapters,
+        ).pack(side='left', padx=5, pady=5)
+
         # "Close" button.
         ttk.Button(
             self,
@@ -136,6 +228,20 @@ class MatrixView(tk.Toplevel, Observer, SubController):
             command=self.on_quit,
         ).pack(side='right', padx=5, pady=5)
 
+        # "Co-occurrence" button.
+        ttk.Button(
+            self,
+            text=_('Co-occurrence'),
+            command=self._open_cooccurrence,
+        ).pack(side='right', padx=5, pady=5)
+
+        # "Export" button.
+        ttk.Button(
+            self,
+            text=_('Export'),
+            command=self._export_matrix,
+        ).pack(side='right', padx=5, pady=5)
+
         # Help button.
         ttk.Button(
             self,
@@ -143,10 +249,21 @@ class MatrixView(tk.Toplevel, Observer, SubController):
             command=self._open_help,
         ).pack(side='right', padx=5, pady=5)
 
+        # "Diagnostics" button, if the operations are measured.
+        if instrumentation.isEnabled:
+            ttk.Button(
+                self,
+                text=_('Diagnostics'),
+                command=self._open_diagnostics,
+            ).pack(side='right', padx=5, pady=5)
+            self._count_widgets()
+
     def lock(self):
         """Inhibit element change."""
+        self._write_back()
         Node.isLocked = True
 
+    @instrumentation.timed('view_refresh')
     def refresh(self):
         """Refresh the view after changes have been made "outsides"."""
         if not self.isOpen:
@@ -155,16 +272,30 @@ class MatrixView(tk.Toplevel, Observer, SubController):
         if self._skipUpdate:
             return
 
-        self.tableFrame.pack_forget()
-        self.tableFrame.destroy()
-        self.tableFrame = TableFrame(self.mainWindow)
-        self.tableFrame.pack(fill='both', expand=True, padx=2, pady=2)
-        self._relationsTable.draw_matrix(self.tableFrame)
-        self._relationsTable.set_nodes()
+        # Pending node changes would otherwise be overwritten.
+        self._write_back()
+
+        # The chapter rows are compared with the updated index.
+        if self._sectionIndex is not None:
+            self._sectionIndex.update()
+        if not self._relationsTable.refresh():
+            # Too many changes: Rebuild the table, reusing the table frame.
+            self._relationsTable.draw_matrix(self.tableFrame)
+            self._relationsTable.set_nodes(onProgress=self._show_progress)
+
+        # The changes may affect the filter choices and results.
+        self._filterBar.update_choices()
+        self._apply_filter()
+        self._update_cooccurrence()
 
     def on_quit(self, event=None):
+        self._write_back()
+        if self._mdl.novel is not None:
+            self._relationsTable.cancel_build()
+        instrumentation.save_profiles()
         self.isOpen = False
         prefs['window_geometry'] = self.winfo_geometry()
+        self._save_view_state()
         self.tableFrame.destroy()
         # this is necessary for deleting the event bindings
         self._mdl.delete_observer(self)
@@ -174,42 +305,365 @@ class MatrixView(tk.Toplevel, Observer, SubController):
         """Enable element change."""
         Node.isLocked = False
 
+    def _apply_filter(self):
+        # Display only the rows matching the filter settings.
+        # The rows removed from the table lose their nodes,
+        # so the pending node changes are written back first.
+        self._write_back()
+        if not self._filterBar.isActive:
+            self._relationsTable.filter_rows(None)
+            self._filterBar.set_count(None)
+            return
+
+        chId, text, elemIds = self._filterBar.get_filter()
+        scIds = self._get_section_index().find(
+            chId=chId,
+            text=text,
+            elemIds=elemIds,
+        )
+        self._relationsTable.filter_rows(scIds)
+        self._filterBar.set_count(len(scIds))
+
+    def _change_aggregate_chapters(self):
+        # The rows removed from the table lose their nodes.
+        self._write_back()
+        prefs['aggregate_chapters'] = (
+            self._aggregateChapters.get()
+        )
+        if prefs['aggregate_chapters']:
+            self._relationsTable.aggregate_chapters(
+                self._get_section_index()
+            )
+        else:
+            self._relationsTable.aggregate_chapters(None)
+
     def _change_major_characters_only(self):
         prefs['major_characters_only'] = (
             self._majorCharactersOnly.get()
         )
         if prefs['show_characters']:
-            self.refresh()
+            self._relationsTable.show_columns(CHARACTERS)
+
+    def _change_selection(self, mode):
+        # Change the selected nodes, and update the model at once.
+        # The model's observers are notified only once.
+        if Node.isLocked:
+            return
+
+        # Pending single node changes are logged separately.
+        self._write_back()
+        for node in self._relationsTable.change_selection(mode):
+            self._pendingNodes[node] = None
+        self._write_back(oneEntry=True)
 
     def _change_show_characters(self):
         prefs['show_characters'] = (
             self._showCharacters.get()
         )
-        self.refresh()
+        self._relationsTable.show_columns(CHARACTERS)
 
     def _change_show_items(self):
         prefs['show_items'] = (
             self._showItems.get()
         )
-        self.refresh()
+        self._relationsTable.show_columns(ITEMS)
 
     def _change_show_locations(self):
         prefs['show_locations'] = (
             self._showLocations.get()
         )
-        self.refresh()
+        self._relationsTable.show_columns(LOCATIONS)
 
     def _change_show_plot_lines(self):
         prefs['show_plot_lines'] = (
             self._showPlotlines.get()
         )
-        self.refresh()
+        self._relationsTable.show_columns(PLOT_LINES)
+
+    def _count_widgets(self):
+        # Record the numbers of widgets and canvas items.
+
+        def count_children(widget):
+            count = 1
+            for child in widget.winfo_children():
+                count += count_children(child)
+            return count
+
+        instrumentation.set_value('widgets', count_children(self))
+        canvasItems = 0
+        for canvas in (
+            self.tableFrame.display,
+            self.tableFrame.rowTitles,
+            self.tableFrame.columnTitles,
+        ):
+            canvasItems += len(canvas.find_all())
+        instrumentation.set_value('canvas items', canvasItems)
+
+    def _expand_chapter(self, chId, expand):
+        # The rows removed from the table lose their nodes.
+        self._write_back()
+        self._relationsTable.expand_chapter(chId, expand)
+
+    def _export_matrix(self):
+        filePath = filedialog.asksaveasfilename(
+            parent=self,
+            title=_('Export matrix'),
+            defaultextension='.csv',
+            filetypes=[
+                (_('CSV file'), '.csv'),
+                (_('TSV file'), '.tsv'),
+                (_('HTML file'), '.html'),
+            ],
+        )
+        if not filePath:
+            return
+
+        # The export reads the relations from the model.
+        self._write_back()
+        try:
+            export_matrix(self._mdl.novel, filePath)
+        except (OSError, ValueError) as ex:
+            messagebox.showerror(_('Export matrix'), str(ex), parent=self)
+
+    def _get_section_index(self):
+        # Return the section index, building it on first use.
+        if self._sectionIndex is None:
+            self._sectionIndex = SectionIndex(self._mdl.novel)
+        return self._sectionIndex
+
+    def _get_project_path(self):
+        # Return the project file path, or None if there is no project.
+        prjFile = getattr(self._mdl, 'prjFile', None)
+        if self._mdl.novel is None or prjFile is None:
+            return None
+
+        return prjFile.filePath
+
+    def _get_view_state(self):
+        # Return the project's view state stored on the last quit.
+        # The state is empty, if the novel's structure has changed since.
+        if self._viewStates is None:
+            return {}
+
+        projectPath = self._get_project_path()
+        if not projectPath:
+            return {}
+
+        viewState = self._viewStates.get(
+            projectPath,
+            ViewStates.get_fingerprint(self._mdl.novel),
+        )
+        if not self._is_valid_view_state(viewState):
+            return {}
+
+        return viewState
+
+    def _is_text_input(self, event):
+        # True, if the key event is for a text entry, e.g. in the
+        # filter bar. Entries and comboboxes keep their own key bindings.
+        return event is not None and isinstance(event.widget, tk.Entry)
+
+    def _is_valid_view_state(self, viewState):
+        # True, if the view state has the structure stored on quit.
+        # The file may have been stored by another version, or edited.
+        if not isinstance(viewState, dict):
+            return False
+
+        if 'filter' in viewState:
+            viewFilter = viewState['filter']
+            if not isinstance(viewFilter, list) or len(viewFilter) != 3:
+                return False
+
+            chId, text, elemIds = viewFilter
+            if chId is not None and not isinstance(chId, str):
+                return False
+
+            if not isinstance(text, str) or not isinstance(elemIds, list):
+                return False
+
+            for elemId in elemIds:
+                if not isinstance(elemId, str):
+                    return False
+
+        if 'scroll' in viewState:
+            scroll = viewState['scroll']
+            if not isinstance(scroll, list) or len(scroll) != 2:
+                return False
+
+            for offset in scroll:
+                if (
+                    isinstance(offset, bool)
+                    or not isinstance(offset, (int, float))
+                ):
+                    return False
+
+        if 'layout' in viewState:
+            layout = viewState['layout']
+            if not isinstance(layout, dict):
+                return False
+
+            rowHeight = layout.get('rowHeight', None)
+            textWidths = layout.get('textWidths', None)
+            if (
+                not isinstance(layout.get('font', None), dict)
+                or isinstance(rowHeight, bool)
+                or not isinstance(rowHeight, int)
+                or rowHeight <= 0
+                or not isinstance(textWidths, dict)
+            ):
+                return False
+
+            for width in textWidths.values():
+                if isinstance(width, bool) or not isinstance(width, int):
+                    return False
+
+        return True
+
+    def _on_element_change(self, scId, category, elemId):
+        # Schedule the node change for the write-back.
+        # A burst of changes is written back in one pass.
+        self._pendingNodes[scId, category, elemId] = None
+        if self._writeBackJob is not None:
+            self.after_cancel(self._writeBackJob)
+        self._writeBackJob = self.after(
+            self.WRITE_BACK_DELAY,
+            self._write_back,
+        )
 
-    def _on_element_change(self, event=None):
-        # Update the model, but not the view.
-        self._skipUpdate = True
-        self._relationsTable.get_nodes()
-        self._skipUpdate = False
+    def _open_cooccurrence(self):
+        # The counts are computed from the model.
+        self._write_back()
+        if self._cooccurrenceView is not None:
+            if self._cooccurrenceView.isOpen:
+                self._cooccurrenceView.lift()
+                return
+
+        self._cooccurrenceView = CooccurrenceView(
+            self,
+            self._mdl.novel,
+            self._cooccurrence,
+        )
+
+    def _open_diagnostics(self):
+        DiagnosticsDialog(self, onUpdate=self._count_widgets)
 
     def _open_help(self, event=None):
         self._ctrl.open_help(page=HELP_PAGE)
+
+    def _open_selection_menu(self, event):
+        if Node.isLocked or not self._relationsTable.hasSelection:
+            return
+
+        self._selectionMenu.tk_popup(event.x_root, event.y_root)
+
+    def _redo(self, event=None):
+        if self._is_text_input(event):
+            return
+
+        self._replay(self._editLog.redo)
+
+    @instrumentation.timed('replay')
+    def _replay(self, applyEntry):
+        # Apply an edit log entry to the model and to the table.
+        # Only the nodes of the changed relations are touched.
+        if Node.isLocked:
+            return
+
+        # Pending node changes are logged first.
+        self._write_back()
+        self._skipUpdate = True
+        try:
+            modifiedSections = applyEntry()
+            self._relationsTable.update_sections(modifiedSections)
+            self._set_modified(modifiedSections)
+        finally:
+            self._skipUpdate = False
+
+    def _save_view_state(self):
+        # Store the scroll position, the filter settings,
+        # and the table's measurements for reopening the project.
+        if self._viewStates is None:
+            return
+
+        projectPath = self._get_project_path()
+        if not projectPath:
+            return
+
+        x0, y0, __, __ = self.tableFrame.get_viewport()
+        self._viewStates.set(
+            projectPath,
+            ViewStates.get_fingerprint(self._mdl.novel),
+            dict(
+                scroll=[x0, y0],
+                filter=list(self._filterBar.get_filter()),
+                layout=self._relationsTable.get_layout_cache(),
+            ),
+        )
+        self._viewStates.save()
+
+    def _set_modified(self, modifiedSections):
+        # Update the views depending on the modified sections,
+        # and notify the model's observers once.
+        if not modifiedSections:
+            return
+
+        if self._sectionIndex is not None:
+            self._relationsTable.update_chapter_rows(
+                self._sectionIndex.update_sections(modifiedSections)
+            )
+        self._update_cooccurrence()
+        self._mdl.isModified = True
+
+    def _show_progress(self, rowsDone, rowCount):
+        # Display a progress bar until all nodes are set.
+        if rowsDone < rowCount:
+            if self._progressBar is None:
+                self._progressBar = ttk.Progressbar(self, length=150)
+                self._progressBar.pack(side='right', padx=5, pady=5)
+            self._progressBar.configure(maximum=rowCount, value=rowsDone)
+        elif self._progressBar is not None:
+            self._progressBar.destroy()
+            self._progressBar = None
+
+    def _undo(self, event=None):
+        if self._is_text_input(event):
+            return
+
+        self._replay(self._editLog.undo)
+
+    def _update_cooccurrence(self):
+        # Discard the counts after the relations may have changed.
+        self._cooccurrence.invalidate()
+        if self._cooccurrenceView is not None:
+            if self._cooccurrenceView.isOpen:
+                self._cooccurrenceView.refresh()
+
+    @instrumentation.timed('write_back')
+    def _write_back(self, oneEntry=False):
+        # Update the model with the pending node changes,
+        # but not the view. Notify the observers only once.
+        # Each node change is logged as an edit of its own,
+        # unless oneEntry is True.
+        if self._writeBackJob is not None:
+            self.after_cancel(self._writeBackJob)
+            self._writeBackJob = None
+        if not self._pendingNodes:
+            return
+
+        self._skipUpdate = True
+        try:
+            deltas = []
+            modifiedSections = self._relationsTable.get_nodes(
+                self._pendingNodes,
+                deltas,
+            )
+            self._pendingNodes.clear()
+            if oneEntry:
+                self._editLog.add(deltas)
+            else:
+                for delta in deltas:
+                    self._editLog.add((delta,))
+            self._set_modified(modifiedSections)
+        finally:
+            # Otherwise, the view would ignore all further model changes.
+            self._skipUpdate = False
@@ -0,0 +1,608 @@
+"""Provide a class drawing a grid of matrix nodes on a canvas.
+
+Copyright (c) Peter Triesberger
+For further information see https://github.com/peter88213/nv_matrix
+License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
+"""
+from bisect import bisect_right
+
+from nvmatrix.canvas_items import CanvasItems
+from nvmatrix.canvas_tooltip import CanvasTooltip
+from nvmatrix.item_pool import ItemPool
+from nvmatrix.node import Node
+from nvmatrix.palette import Palette
+from nvmatrix.platform.platform_settings import MOUSE
+from nvmatrix.title_band import TitleBand
+
+
+class NodeGrid:
+    """A grid of visual matrix nodes, drawn as items on one canvas.
+
+    Instead of creating one widget per node, the grid is drawn
+    on a single tk.Canvas:
+    - The striped background is drawn in layers: one rectangle for
+      the whole area, one per odd column, one per odd row, and one
+      per intersection of an odd row and an odd column.
+    - Each node with a True state is a text item showing the marker.
+      The node states are read from a RelationMatrix.
+    - The footer rows with the column titles and the category titles
+      are drawn below the nodes.
+    Only the rows and columns within the rendered area, plus an
+    overscan margin, get canvas items; these are recycled on scrolling,
+    and parked in an ItemPool on layout changes.
+    Nodes are addressed by row and column index; mouse events are
+    mapped to nodes by their coordinates.
+    A rectangular range of nodes can be selected by dragging;
+    the selection is shown as a frame around the range.
+    """
+    OVERSCAN = 4
+
+    def __init__(
+            self,
+            canvas,
+            rowHeight,
+            colorsBackground,
+            relations,
+            onToggle=None,
+            canToggle=None,
+            getNote=None,
+            tooltip=None,
+    ):
+        """Bind the grid to the canvas.
+
+        Positional arguments:
+            canvas: tk.Canvas -- The canvas to draw on.
+            rowHeight: int -- Height of a grid row in pixels.
+            colorsBackground -- ((row0col0, row0col1), (row1col0, row1col1))
+                                background colors of the node stripes.
+            relations: RelationMatrix -- The node states.
+
+        Optional arguments:
+            onToggle -- Callback function onToggle(row, col) called
+                        after the user has toggled a node.
+            canToggle -- Callback function canToggle(row) returning
+                         False, if the row's nodes cannot be toggled.
+            getNote -- Callback function getNote(row, col) returning
+                       the node's tooltip text, or an empty string.
+            tooltip: CanvasTooltip -- Tooltip shared with other canvases.
+        """
+        self._canvas = canvas
+        self._onToggle = onToggle
+        self._canToggle = canToggle
+        self._getNote = getNote
+        self.rowHeight = rowHeight
+        self._colorsBackground = colorsBackground
+        self.rowCount = 0
+
+        # Column geometry and attributes.
+        self._xOffsets = [0]
+        self._nodeColors = []
+        self._columnTitles = []
+        self._categories = []
+
+        # Node states.
+        self._relations = relations
+
+        # Nodes whose markers are to be updated by end_update().
+        self._changedNodes = None
+
+        # Number of Tcl scripts evaluated for marker changes.
+        # Other canvas calls, e.g. for the layout, are not counted.
+        self.markerScripts = 0
+
+        # Canvas items, and the rows and columns they cover.
+        self._pool = ItemPool(canvas)
+        self._background = canvas.create_rectangle(
+            0, 0, 0, 0,
+            fill=colorsBackground[0][0],
+            width=0,
+        )
+        self._columnStripes = CanvasItems(
+            canvas,
+            self._create_column_stripe,
+            self._place_column_stripe,
+            pool=self._pool,
+            kind='columnStripe',
+        )
+        self._rowStripes = CanvasItems(
+            canvas,
+            self._create_row_stripe,
+            self._place_row_stripe,
+            pool=self._pool,
+            kind='rowStripe',
+        )
+        self._crossings = CanvasItems(
+            canvas,
+            self._create_crossing,
+            self._place_crossing,
+            pool=self._pool,
+            kind='crossing',
+        )
+        self._markers = CanvasItems(
+            canvas,
+            self._create_marker,
+            self._place_marker,
+            pool=self._pool,
+            kind='marker',
+        )
+        self._footer = TitleBand(canvas, False, rowHeight, pool=self._pool)
+        self._rows = range(0)
+        self._columns = range(0)
+
+        # Selected range: (rows, columns), or None.
+        self.selection = None
+        self._selectionAnchor = None
+        self._selectionFrame = canvas.create_rectangle(
+            0, 0, 0, 0,
+            outline=Palette.BLACK,
+            width=2,
+            state='hidden',
+            tags='selection',
+        )
+
+        # The tooltip texts are retrieved on demand.
+        if tooltip is None:
+            tooltip = CanvasTooltip()
+        tooltip.add_canvas(canvas, self.cell_at, self._get_tooltip_text)
+
+        self._canvas.bind(MOUSE.TOGGLE_STATE, self._toggle_state)
+        self._canvas.bind(MOUSE.SELECT_RANGE, self._start_selection)
+        self._canvas.bind(MOUSE.EXTEND_SELECTION, self._extend_selection)
+
+    @property
+    def columnCount(self):
+        return len(self._nodeColors)
+
+    @property
+    def width(self):
+        return self._xOffsets[-1]
+
+    @property
+    def height(self):
+        # Node rows plus two footer rows.
+        return (self.rowCount + 2) * self.rowHeight
+
+    def add_column(
+            self,
+            width,
+            colorTrue,
+            title,
+            fgColor,
+            bgColor,
+            hoverText='',
+    ):
+        """Append a column and return its index.
+
+        Positional arguments:
+            width: int -- Column width in pixels.
+            colorTrue: str -- Marker color.
+            title: str -- Column title to be displayed in the footer.
+            fgColor: str -- Column title foreground color.
+            bgColor: str -- Column title background color.
+
+        Optional arguments:
+            hoverText: str -- Tooltip text for the column title.
+        """
+        self._xOffsets.append(self._xOffsets[-1] + width)
+        self._nodeColors.append(colorTrue)
+        self._columnTitles.append((title, fgColor, bgColor, hoverText))
+        return len(self._nodeColors) - 1
+
+    def add_category(self, title, firstCol, lastCol, fgColor, bgColor):
+        """Add a category title spanning the columns firstCol to lastCol."""
+        self._categories.append((title, firstCol, lastCol, fgColor, bgColor))
+
+    def begin_update(self):
+        """Defer the marker updates of set_state() until end_update()."""
+        if self._changedNodes is None:
+            self._changedNodes = set()
+
+    def clear_selection(self):
+        self.selection = None
+        self._selectionAnchor = None
+        self._canvas.itemconfigure(self._selectionFrame, state='hidden')
+
+    def column_width(self, col):
+        return self._xOffsets[col + 1] - self._xOffsets[col]
+
+    def column_x(self, col):
+        return self._xOffsets[col]
+
+    def cell_at(self, x, y):
+        """Return a (row, column) tuple for the canvas coordinates x, y.
+
+        Return None, if there is no cell at this position.
+        """
+        if x < 0 or y < 0:
+            return None
+
+        col = bisect_right(self._xOffsets, x) - 1
+        if col >= len(self._nodeColors):
+            return None
+
+        row = int(y // self.rowHeight)
+        if row >= self.rowCount + 2:
+            return None
+
+        return row, col
+
+    def draw(self):
+        """Park all existing items and set up the grid for rendering.
+
+        The visible part is drawn by the render() method.
+        The selection is cleared, since the layout may have changed.
+        """
+        self.clear_selection()
+        for items in (
+            self._columnStripes,
+            self._rowStripes,
+            self._crossings,
+            self._markers,
+        ):
+            items.clear()
+        self._rows = range(0)
+        self._columns = range(0)
+        height = self.rowCount * self.rowHeight
+        self._canvas.coords(self._background, 0, 0, self.width, height)
+
+        #--- Footer with column titles and category titles.
+        self._footer.reset()
+        self._footer.offset = height
+        for col, columnTitle in enumerate(self._columnTitles):
+            title, fgColor, bgColor, hoverText = columnTitle
+            self._footer.add_cell(
+                0,
+                self._xOffsets[col],
+                self._xOffsets[col + 1],
+                title,
+                fgColor,
+                bgColor,
+                hoverText=hoverText,
+            )
+        for title, firstCol, lastCol, fgColor, bgColor in self._categories:
+            self._footer.add_cell(
+                1,
+                self._xOffsets[firstCol],
+                self._xOffsets[lastCol + 1],
+                title,
+                fgColor,
+                bgColor,
+                anchor='center',
+            )
+
+    def end_update(self):
+        """Update the markers of the nodes changed since begin_update().
+
+        All marker changes are sent to Tcl as one script.
+        """
+        changedNodes = self._changedNodes
+        self._changedNodes = None
+        if changedNodes:
+            self._update_markers(changedNodes)
+
+    def get_state(self, row, col):
+        return self._relations.get(row, col)
+
+    def replace_column(
+            self,
+            col,
+            colorTrue,
+            title,
+            fgColor,
+            bgColor,
+            hoverText='',
+    ):
+        """Change a column's colors and title, keeping its position."""
+        self._nodeColors[col] = colorTrue
+        self._columnTitles[col] = (title, fgColor, bgColor, hoverText)
+        self._footer.replace_cell(
+            0,
+            col,
+            title,
+            fgColor,
+            bgColor,
+            hoverText=hoverText,
+        )
+        for row in self._rows:
+            items = self._markers.get((row, col))
+            if items is not None:
+                self._canvas.itemconfigure(items[0], fill=colorTrue)
+
+    def reset_columns(self):
+        """Remove all columns, keeping the node states."""
+        self._xOffsets = [0]
+        self._nodeColors = []
+        self._columnTitles = []
+        self._categories = []
+
+    def render(self, x0, y0, x1, y1):
+        """Draw the part of the grid within the canvas area x0, y0, x1, y1."""
+        self._footer.render(x0, x1)
+        firstCol = max(
+            bisect_right(self._xOffsets, x0) - 1 - self.OVERSCAN,
+            0,
+        )
+        lastCol = min(
+            bisect_right(self._xOffsets, x1) + self.OVERSCAN,
+            len(self._nodeColors),
+        )
+        firstRow = max(int(y0 // self.rowHeight) - self.OVERSCAN, 0)
+        lastRow = min(
+            int(y1 // self.rowHeight) + 1 + self.OVERSCAN,
+            self.rowCount,
+        )
+        rows = range(firstRow, lastRow)
+        columns = range(firstCol, lastCol)
+        if rows == self._rows and columns == self._columns:
+            return
+
+        self._rows = rows
+        self._columns = columns
+        oddRows = rows[(firstRow + 1) % 2::2]
+        oddColumns = columns[(firstCol + 1) % 2::2]
+        crossings = set()
+        for row in oddRows:
+            for col in oddColumns:
+                crossings.add((row, col))
+        markers = set()
+        for row in rows:
+            for col in self._relations.get_columns(row, firstCol, lastCol):
+                markers.add((row, col))
+        created = self._columnStripes.update(set(oddColumns))
+        if self._rowStripes.update(set(oddRows)):
+            created = True
+        if self._crossings.update(crossings):
+            created = True
+        if self._markers.update(markers):
+            created = True
+        if created:
+            # Restore the layer order.
+            for tag in ('rowStripe', 'crossing', 'marker', 'selection'):
+                self._canvas.tag_raise(tag)
+
+    def select(self, firstRow, firstCol, lastRow, lastCol):
+        """Select the range of nodes between two corners, inclusively.
+
+        The corners are limited to the grid's nodes.
+        """
+        if not (self.rowCount and self.columnCount):
+            self.clear_selection()
+            return
+
+        firstRow, lastRow = sorted((firstRow, lastRow))
+        firstCol, lastCol = sorted((firstCol, lastCol))
+        firstRow = max(firstRow, 0)
+        firstCol = max(firstCol, 0)
+        lastRow = min(lastRow, self.rowCount - 1)
+        lastCol = min(lastCol, self.columnCount - 1)
+        self.selection = (
+            range(firstRow, lastRow + 1),
+            range(firstCol, lastCol + 1),
+        )
+        self._canvas.coords(
+            self._selectionFrame,
+            self._xOffsets[firstCol],
+            firstRow * self.rowHeight,
+            self._xOffsets[lastCol + 1],
+            (lastRow + 1) * self.rowHeight,
+        )
+        self._canvas.itemconfigure(self._selectionFrame, state='normal')
+        self._canvas.tag_raise(self._selectionFrame)
+
+    def set_state(self, row, col, state):
+        """Set the state of the node at row, col, updating its marker.
+
+        Nodes that already have the state are not touched.
+        """
+        if self._relations.get(row, col) == bool(state):
+            return
+
+        self._relations.set(row, col, state)
+        if self._changedNodes is not None:
+            self._changedNodes.add((row, col))
+        else:
+            self._update_markers(((row, col),))
+
+    def _create_column_stripe(self, col):
+        return (self._canvas.create_rectangle(
+            *self._get_column_stripe_coords(col),
+            fill=self._colorsBackground[0][1],
+            width=0,
+            tags='columnStripe',
+        ),)
+
+    def _create_crossing(self, cell):
+        return (self._canvas.create_rectangle(
+            *self._get_cell_coords(*cell),
+            fill=self._colorsBackground[1][1],
+            width=0,
+            tags='crossing',
+        ),)
+
+    def _create_marker(self, cell):
+        row, col = cell
+        return (self._canvas.create_text(
+            *self._get_marker_coords(row, col),
+            text=Node.marker,
+            fill=self._nodeColors[col],
+            tags='marker',
+        ),)
+
+    def _create_row_stripe(self, row):
+        return (self._canvas.create_rectangle(
+            *self._get_row_stripe_coords(row),
+            fill=self._colorsBackground[1][0],
+            width=0,
+            tags='rowStripe',
+        ),)
+
+    def _extend_selection(self, event):
+        # Select the range between the anchor and the node
+        # under the pointer, while dragging.
+        if self._selectionAnchor is None:
+            return
+
+        x = self._canvas.canvasx(event.x)
+        y = self._canvas.canvasy(event.y)
+        self.select(
+            *self._selectionAnchor,
+            int(y // self.rowHeight),
+            max(bisect_right(self._xOffsets, x) - 1, 0),
+        )
+
+    def _get_cell_coords(self, row, col):
+        y0 = row * self.rowHeight
+        return (
+            self._xOffsets[col],
+            y0,
+            self._xOffsets[col + 1],
+            y0 + self.rowHeight,
+        )
+
+    def _get_column_stripe_coords(self, col):
+        return (
+            self._xOffsets[col],
+            0,
+            self._xOffsets[col + 1],
+            self.rowCount * self.rowHeight,
+        )
+
+    def _get_marker_coords(self, row, col):
+        return (
+            (self._xOffsets[col] + self._xOffsets[col + 1]) // 2,
+            row * self.rowHeight + self.rowHeight // 2,
+        )
+
+    def _get_row_stripe_coords(self, row):
+        y0 = row * self.rowHeight
+        return 0, y0, self.width, y0 + self.rowHeight
+
+    def _get_tooltip_text(self, cell):
+        row, col = cell
+        if row < self.rowCount:
+            if self._getNote is None:
+                return ''
+
+            return self._getNote(row, col)
+
+        if row == self.rowCount:
+            return self._columnTitles[col][3]
+
+        return ''
+
+    def _place_column_stripe(self, items, col):
+        self._canvas.coords(items[0], *self._get_column_stripe_coords(col))
+
+    def _place_crossing(self, items, cell):
+        self._canvas.coords(items[0], *self._get_cell_coords(*cell))
+
+    def _place_marker(self, items, cell):
+        row, col = cell
+        self._canvas.coords(items[0], *self._get_marker_coords(row, col))
+        self._canvas.itemconfigure(items[0], fill=self._nodeColors[col])
+
+    def _place_row_stripe(self, items, row):
+        self._canvas.coords(items[0], *self._get_row_stripe_coords(row))
+
+    def _start_selection(self, event):
+        # Select the node under the pointer as the anchor of a range.
+        cell = self.cell_at(
+            self._canvas.canvasx(event.x),
+            self._canvas.canvasy(event.y),
+        )
+        if cell is None or cell[0] >= self.rowCount:
+            self.clear_selection()
+            return
+
+        self.select(*cell, *cell)
+        self._selectionAnchor = cell
+
+    def _toggle_state(self, event):
+        # Handle the toggle event for all nodes;
+        # only the node under the pointer is changed.
+        self._selectionAnchor = None
+        if Node.isLocked:
+            return
+
+        cell = self.cell_at(
+            self._canvas.canvasx(event.x),
+            self._canvas.canvasy(event.y),
+        )
+        if cell is None:
+            return
+
+        row, col = cell
+        if row >= self.rowCount:
+            return
+
+        if self._canToggle is not None and not self._canToggle(row):
+            return
+
+        self.set_state(row, col, not self.get_state(row, col))
+        if self._onToggle is not None:
+            self._onToggle(row, col)
+
+    def _update_markers(self, cells):
+        # Make the markers of the rendered cells match the node states.
+        # Generate a Tcl script, so that Tcl is called only once:
+        # Markers of cleared nodes are moved to set nodes first,
+        # then parked markers are reused, and the rest is created.
+        cleared = []
+        newlySet = []
+        for cell in cells:
+            row, col = cell
+            if (
+                row in self._rows
+                and col in self._columns
+                and self._relations.get(row, col)
+            ):
+                if not cell in self._markers:
+                    newlySet.append(cell)
+            elif cell in self._markers:
+                cleared.append(cell)
+        if not (cleared or newlySet):
+            return
+
+        canvas = str(self._canvas)
+        script = []
+        created = []
+        reused = False
+        for cell in newlySet:
+            if cleared:
+                items = self._markers.pop(cleared.pop())
+            else:
+                items = self._pool.take('marker', script)
+                if items is None:
+                    created.append(cell)
+                    continue
+
+                reused = True
+
+            row, col = cell
+            x, y = self._get_marker_coords(row, col)
+            script.append(f'{canvas} coords {items[0]} {x} {y}')
+            script.append(
+                f'{canvas} itemconfigure {items[0]}'
+                f' -fill {{{self._nodeColors[col]}}}'
+            )
+            self._markers.put(cell, items)
+        for cell in cleared:
+            self._pool.park('marker', self._markers.pop(cell), script)
+        if reused:
+            # Parked markers may be stacked below the background.
+            script.append(f'{canvas} raise marker')
+
+        # The script's result is the list of the created item IDs.
+        newItems = []
+        for cell in created:
+            row, col = cell
+            x, y = self._get_marker_coords(row, col)
+            newItems.append(
+                f'[{canvas} create text {x} {y} -text {{{Node.marker}}}'
+                f' -fill {{{self._nodeColors[col]}}} -tags marker]'
+            )
+        script.append(f'list {" ".join(newItems)}')
+        result = self._canvas.tk.eval('\n'.join(script))
+        self.markerScripts += 1
+        for cell, item in zip(created, self._canvas.tk.splitlist(result)):
+            self._markers.put(cell, (int(item),))
@@ -8,3 +8,10 @@ License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
 HELP_PAGE = 'nv_matrix'
 prefs = {}
 
+# Element categories, in the order of the matrix columns.
+PLOT_LINES = 'plotLines'
+CHARACTERS = 'characters'
+LOCATIONS = 'locations'
+ITEMS = 'items'
+CATEGORIES = (PLOT_LINES, CHARACTERS, LOCATIONS, ITEMS)
+
@@ -0,0 +1,81 @@
+"""Provide a class for the colors of the relationship matrix.
+
+Copyright (c) Peter Triesberger
+For further information see https://github.com/peter88213/nv_matrix
+License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
+"""
+from nvlib.model.hex_color import HexColor
+from nvmatrix.nvmatrix_globals import prefs
+
+
+class Palette:
+    """The matrix colors, resolved once.
+
+    The color settings may contain named Tk colors like "gray80";
+    these are converted to hexadecimal notation, so that Tk does not
+    have to look up the names for each canvas item.
+    The title and node colors derived from an element color are
+    cached per element color and default background.
+    The color settings are read when the palette is created.
+    They do not change while the application is running,
+    so each window's palette stays valid as long as the window.
+    """
+    BLACK = '#000000'
+    WHITE = '#ffffff'
+
+    def __init__(self, widget):
+        """Resolve the colors of the current settings.
+
+        Positional arguments:
+            widget: tk.Widget -- Any widget, used for color lookup.
+        """
+        self._widget = widget
+        self._hexColors = {}
+        self._elementColors = {}
+        self.background = (
+            (self.to_hex(prefs['color_bg_00']),
+             self.to_hex(prefs['color_bg_01'])),
+            (self.to_hex(prefs['color_bg_10']),
+             self.to_hex(prefs['color_bg_11'])),
+        )
+        self.headerBackground = (
+            self.to_hex(prefs['color_hd_bright']),
+            self.to_hex(prefs['color_hd_dark']),
+        )
+        self.headerForeground = (
+            self.BLACK,
+            self.WHITE,
+        )
+        self.node = self.to_hex(prefs['color_node'])
+
+    def get_element_colors(self, elemColor, defaultBg):
+        """Return a (fgColor, bgColor, nodeColor) tuple for an element.
+
+        Positional arguments:
+            elemColor: str -- The element's color, or None.
+            defaultBg: str -- Title background color of uncolored elements.
+        """
+        colors = self._elementColors.get((elemColor, defaultBg), None)
+        if colors is None:
+            if elemColor is not None:
+                if HexColor.is_dark(elemColor):
+                    fgColor = self.WHITE
+                else:
+                    fgColor = self.BLACK
+                colors = (fgColor, elemColor, elemColor)
+            else:
+                colors = (self.BLACK, defaultBg, self.node)
+            self._elementColors[elemColor, defaultBg] = colors
+        return colors
+
+    def to_hex(self, color):
+        """Return a Tk color in hexadecimal notation '#rrggbb'."""
+        hexColor = self._hexColors.get(color, None)
+        if hexColor is None:
+            if color.startswith('#') and len(color) == 7:
+                hexColor = color
+            else:
+                red, green, blue = self._widget.winfo_rgb(color)
+                hexColor = f'#{red >> 8:02x}{green >> 8:02x}{blue >> 8:02x}'
+            self._hexColors[color] = hexColor
+        return hexColor
@@ -9,3 +9,7 @@ License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
 class GenericMouse:
 
     TOGGLE_STATE = '<Control-Button-1>'
+    EXPAND_ROW = '<Button-1>'
+    SELECT_RANGE = '<Button-1>'
+    EXTEND_SELECTION = '<B1-Motion>'
+    OPEN_CONTEXT_MENU = '<Button-3>'
@@ -10,4 +10,6 @@ from nvmatrix.platform.generic_keys import GenericKeys
 class MacKeys(GenericKeys):
 
     QUIT_PROGRAM = ('<Command-q>', 'Cmd-Q')
+    REDO = ('<Command-Shift-Z>', 'Cmd-Shift-Z')
+    UNDO = ('<Command-z>', 'Cmd-Z')
 
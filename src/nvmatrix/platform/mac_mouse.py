@@ -10,3 +10,4 @@ from nvmatrix.platform.generic_mouse import GenericMouse
 class MacMouse(GenericMouse):
 
     TOGGLE_STATE = '<Command-Button-1>'
+    OPEN_CONTEXT_MENU = '<Button-2>'
@@ -0,0 +1,169 @@
+"""Provide a class for a compact matrix of section relationships.
+
+Copyright (c) Peter Triesberger
+For further information see https://github.com/peter88213/nv_matrix
+License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
+"""
+
+
+class RelationMatrix:
+    """A matrix of relations between sections and elements.
+
+    Rows represent sections, columns represent elements.
+    Each row is a packed bit row, i.e. a Python integer
+    with bit n set if the section is related to the element
+    in column n.
+    The index maps (public instance variables) are:
+    rows: {section ID: row}
+    columns: {element ID: column}
+
+    The matrix does not depend on tkinter, so it can be queried,
+    counted, and compared without a GUI.
+    """
+
+    def __init__(self):
+        self.sectionIds = []
+        self.elementIds = []
+        self.rows = {}
+        self.columns = {}
+        self._bits = []
+
+    @property
+    def rowCount(self):
+        return len(self.sectionIds)
+
+    @property
+    def columnCount(self):
+        return len(self.elementIds)
+
+    def copy(self):
+        """Return an independent copy of the matrix."""
+        matrix = RelationMatrix()
+        matrix.sectionIds = self.sectionIds[:]
+        matrix.elementIds = self.elementIds[:]
+        matrix.rows = self.rows.copy()
+        matrix.columns = self.columns.copy()
+        matrix._bits = self._bits[:]
+        return matrix
+
+    def count(self):
+        """Return the number of relations."""
+        count = 0
+        for bits in self._bits:
+            count += bin(bits).count('1')
+        return count
+
+    def diff(self, other):
+        """Return a set of (section ID, element ID) tuples.
+
+        The set contains the relations that exist
+        in only one of the matrices.
+        """
+        differences = set()
+        otherRelations = set(other.get_relations())
+        for relation in self.get_relations():
+            if relation in otherRelations:
+                otherRelations.discard(relation)
+            else:
+                differences.add(relation)
+        differences.update(otherRelations)
+        return differences
+
+    def get(self, row, col):
+        """Return True, if there is a relation at row, col."""
+        return bool(self._bits[row] >> col & 1)
+
+    def get_columns(self, row, firstCol=0, lastCol=None):
+        """Return a list with the related columns of a row.
+
+        Positional arguments:
+            row: int -- Row index.
+
+        Optional arguments:
+            firstCol: int -- Index of the first column to consider.
+            lastCol: int -- Index after the last column to consider.
+        """
+        bits = self._bits[row] >> firstCol
+        if lastCol is not None:
+            bits &= (1 << (lastCol - firstCol)) - 1
+        columns = []
+        while bits:
+            lowestBit = bits & -bits
+            columns.append(firstCol + lowestBit.bit_length() - 1)
+            bits ^= lowestBit
+        return columns
+
+    def get_elements(self, scId):
+        """Return a list with the IDs of the elements related to a section."""
+        elementIds = []
+        for col in self.get_columns(self.rows[scId]):
+            elementIds.append(self.elementIds[col])
+        return elementIds
+
+    def get_relations(self):
+        """Iterate over all relations as (section ID, element ID) tuples."""
+        for row, scId in enumerate(self.sectionIds):
+            for col in self.get_columns(row):
+                yield scId, self.elementIds[col]
+
+    def get_sections(self, elemId):
+        """Return a list with the IDs of the sections related to an element."""
+        mask = 1 << self.columns[elemId]
+        sectionIds = []
+        for row, bits in enumerate(self._bits):
+            if bits & mask:
+                sectionIds.append(self.sectionIds[row])
+        return sectionIds
+
+    def is_related(self, scId, elemId):
+        """Return True, if the section is related to the element."""
+        return self.get(self.rows[scId], self.columns[elemId])
+
+    def relate(self, scId, elemId, state):
+        """Set or clear the relation between a section and an element."""
+        self.set(self.rows[scId], self.columns[elemId], state)
+
+    def set(self, row, col, state):
+        """Set or clear the relation at row, col."""
+        if state:
+            self._bits[row] |= 1 << col
+        else:
+            self._bits[row] &= ~(1 << col)
+
+    def set_layout(self, sectionIds, elementIds):
+        """Arrange the rows and columns in a new order.
+
+        Positional arguments:
+            sectionIds: list -- Section IDs in row order.
+            elementIds: list -- Element IDs in column order.
+
+        The relations of retained sections and elements are kept.
+        New rows and columns have no relations.
+        """
+        colMap = {}
+        for col, elemId in enumerate(elementIds):
+            if elemId in self.columns:
+                colMap[self.columns[elemId]] = col
+        keepColumns = list(elementIds) == self.elementIds
+        bits = []
+        for scId in sectionIds:
+            row = self.rows.get(scId, None)
+            if row is None:
+                bits.append(0)
+            elif keepColumns:
+                bits.append(self._bits[row])
+            else:
+                newBits = 0
+                for col in self.get_columns(row):
+                    if col in colMap:
+                        newBits |= 1 << colMap[col]
+                bits.append(newBits)
+        self._bits = bits
+        self.sectionIds = list(sectionIds)
+        self.elementIds = list(elementIds)
+        self.rows = {}
+        for row, scId in enumerate(self.sectionIds):
+            self.rows[scId] = row
+        self.columns = {}
+        for col, elemId in enumerate(self.elementIds):
+            self.columns[elemId] = col
@@ -4,550 +4,1269 @@ Copyright (c) Peter Triesberger
 For further information see https://github.com/peter88213/nv_matrix
 License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
 """
+from bisect import bisect_left
+from bisect import insort
+from functools import lru_cache
 import textwrap
-from tkinter import ttk
+import time
+from tkinter.font import nametofont
 
-from nvlib.model.hex_color import HexColor
 from nvlib.novx_globals import CH_ROOT
-from nvlib.novx_globals import CR_ROOT
-from nvlib.novx_globals import IT_ROOT
-from nvlib.novx_globals import LC_ROOT
-from nvlib.novx_globals import PL_ROOT
+from nvmatrix.canvas_tooltip import CanvasTooltip
+from nvmatrix.instrumentation import instrumentation
+from nvmatrix.matrix_layout import get_categories
+from nvmatrix.matrix_layout import get_category
+from nvmatrix.matrix_layout import iter_sections
 from nvmatrix.node import Node
-from nvmatrix.nvmatrix_globals import prefs
+from nvmatrix.node_grid import NodeGrid
+from nvmatrix.nvmatrix_globals import CATEGORIES
+from nvmatrix.nvmatrix_globals import CHARACTERS
+from nvmatrix.nvmatrix_globals import ITEMS
+from nvmatrix.nvmatrix_globals import LOCATIONS
+from nvmatrix.nvmatrix_globals import PLOT_LINES
 from nvmatrix.nvmatrix_locale import _
+from nvmatrix.palette import Palette
+from nvmatrix.platform.platform_settings import MOUSE
+from nvmatrix.relation_matrix import RelationMatrix
+from nvmatrix.title_band import TitleBand
 import tkinter as tk
 
 
 class RelationsTable:
-    """Represent a table of relationships. 
-    
-    The visual part consists of one frame per column, each containing 
-    one node per row. 
-    The logical part consists of one dictionary per element type 
-    (protected instance variables):
-    {section ID: {element Id: node}}
+    """Represent a table of relationships.
+
+    The visual part consists of a grid of nodes, a band of row titles,
+    and a band of column titles, drawn on the canvases of a
+    virtual TableFrame. Only the visible part is drawn.
+    The logical part is a RelationMatrix holding the node states,
+    with index maps for section and element IDs, and the element
+    columns per category (protected instance variable):
+    {category: {element ID: column}}.
+
+    On refresh, the table is compared with the model,
+    and only the changed rows, columns, and nodes are updated.
+
+    In chapter mode, each chapter is displayed as a row whose
+    nodes are set if any of the chapter's sections is related
+    to the element. The relation matrix holds these rows under
+    the chapter IDs. A chapter row can be expanded, showing the
+    chapter's section rows below. The chapter aggregates are
+    taken from a SectionIndex.
+
+    The nodes can be set progressively, in time-sliced chunks of rows,
+    so that the application remains responsive with large projects.
     """
     NOTE_WIDTH = 30
+    NOTE_CACHE_SIZE = 256
+    # Number of wrapped plot line notes kept for the tooltip.
 
-    def __init__(self, master, novel, setHovertip):
+    REBUILD_THRESHOLD = 0.5
+    # Maximum share of added and removed rows and columns
+    # for an incremental refresh.
+
+    BUILD_TIME_SLICE = 0.05
+    # Seconds of node setting before the application gets control back.
+
+    def __init__(
+            self,
+            master,
+            novel,
+            onToggle=None,
+            onExpand=None,
+            layoutCache=None,
+    ):
         """Draw the matrix with blank nodes.
-        
+
         Positional arguments:
+            master: TableFrame -- Virtual table frame to draw on.
             novel: Novel -- Project reference.
-            
+
+        Optional arguments:
+            onToggle -- Callback function onToggle(scId, category, elemId)
+                        called after the user has toggled a node.
+            onExpand -- Callback function onExpand(chId, expand)
+                        called when the user clicks on a chapter row's
+                        title, instead of expanding or collapsing
+                        the chapter row directly.
+            layoutCache: dict -- Measurements returned by
+                                 get_layout_cache() for a previous
+                                 table; used instead of measuring,
+                                 if the font is still the same.
         """
         self._novel = novel
-        self._setHovertip = setHovertip
+        self._onToggle = onToggle
+        self._onExpand = onExpand
+        self._relations = RelationMatrix()
+        self._layoutCache = layoutCache
+        self._textWidths = {}
+
+        # Text widths from the layout cache, not yet used by the table.
+        self._cachedWidths = {}
+
+        self._buildJob = None
+        self._tableFrame = None
+
+        # IDs of the sections to display; None means all.
+        self._rowFilter = None
+
+        # In chapter mode, the index providing the chapter aggregates.
+        self._sectionIndex = None
+        self._expandedChapters = set()
+
+        # Number of Tcl scripts evaluated for marker changes
+        # during the last refresh. Layout changes are not counted.
+        self.markerScripts = 0
+
+        self._columns = {}
+        for category in CATEGORIES:
+            self._columns[category] = {}
         self.draw_matrix(master)
 
-    def draw_matrix(self, master):
+    @property
+    def isBuilding(self):
+        # True while the nodes are set progressively.
+        return self._buildJob is not None
+
+    @property
+    def hasSelection(self):
+        return self._grid.selection is not None
+
+    def aggregate_chapters(self, sectionIndex=None):
+        """Switch the chapter mode on or off.
+
+        Optional arguments:
+            sectionIndex: SectionIndex -- Index providing the numbers of
+                                          related sections per chapter.
+                                          If None, the chapter mode is off.
+
+        Only the rows are rearranged, as with filter_rows().
+        The caller must keep the index up to date, and call
+        update_chapter_rows() after updating it.
+        """
+        if sectionIndex is self._sectionIndex:
+            return
+
+        self._sectionIndex = sectionIndex
+        self._relayout_rows()
 
-        def fill_str(text):
-            # Return a string that is at least 7 characters long.
-            # Extend text with spaces so that it does not fall
-            # below the length of 7 characters.
-            # This is for column titles, to widen narrow columns.
-            while len(text) < 7:
-                text = f' {text} '
-            return text
-
-        def get_colors(elements, elemId, defaultBg):
-            elemColor = elements[elemId].color
-            if elemColor is not None:
-                if HexColor.is_dark(elemColor):
-                    fgColor = WHITE
-                else:
-                    fgColor = BLACK
-                bgColor = nodeColor = elemColor
+    def cancel_build(self):
+        """Stop setting the nodes progressively.
+
+        Return True, if a progressive build was running.
+        The rows not yet built are set on refresh.
+        """
+        if self._buildJob is None:
+            return False
+
+        self._tableFrame.after_cancel(self._buildJob)
+        self._buildJob = None
+        return True
+
+    @instrumentation.timed('change_selection')
+    def change_selection(self, mode):
+        """Set, clear, or invert the selected nodes.
+
+        Positional arguments:
+            mode: str -- 'set', 'clear', or 'invert'.
+
+        Chapter rows are skipped.
+        The model is not modified; this is up to the caller.
+        Return a list of (section ID, category, element ID) tuples
+        of the changed nodes.
+        """
+        if self._grid.selection is None:
+            return []
+
+        rows, columns = self._grid.selection
+        changedNodes = []
+        self._grid.begin_update()
+        for row in rows:
+            scId = self._relations.sectionIds[row]
+            if self._is_chapter_row(scId):
+                continue
+
+            if not scId in self._signatures:
+                # The row is not built yet: Start with the model's state.
+                self._set_row_nodes(scId)
+            relatedColumns = set(
+                self._relations.get_columns(row, columns.start, columns.stop)
+            )
+            if mode == 'set':
+                changedColumns = set(columns) - relatedColumns
+            elif mode == 'clear':
+                changedColumns = relatedColumns
             else:
-                fgColor = BLACK
-                bgColor = defaultBg
-                nodeColor = prefs['color_node']
-            return fgColor, bgColor, nodeColor
+                changedColumns = set(columns)
+            for col in sorted(changedColumns):
+                self._grid.set_state(row, col, not col in relatedColumns)
+                changedNodes.append((scId, *self._columnKeys[col]))
+        self._grid.end_update()
+        return changedNodes
+
+    @instrumentation.timed('draw_matrix')
+    def draw_matrix(self, master):
+        """Set up the matrix layout with blank nodes.
+
+        Positional arguments:
+            master: TableFrame -- Virtual table frame to draw on.
+
+        If the table frame is already in use, its canvases and
+        canvas items are reused.
+        """
+        self.cancel_build()
+        if master is not self._tableFrame:
+            self._set_up(master)
+        self._signatures = {}
+        self._plotPointIndex = None
+        self._layout(self._get_row_ids(), get_categories(self._novel))
+        self._set_extent()
+
+    def expand_chapter(self, chId, expand=True):
+        """Show or hide the section rows of a chapter in chapter mode.
+
+        Pending node changes must be written back before.
+        """
+        if expand == (chId in self._expandedChapters):
+            return
 
-        BLACK = '#000000'
-        WHITE = '#ffffff'
+        if expand:
+            self._expandedChapters.add(chId)
+        else:
+            self._expandedChapters.discard(chId)
+        if self._sectionIndex is not None:
+            self._relayout_rows()
 
-        colorsBackground = (
-            (prefs['color_bg_00'], prefs['color_bg_01']),
-            (prefs['color_bg_10'], prefs['color_bg_11']),
+    @instrumentation.timed('filter_rows')
+    def filter_rows(self, scIds=None):
+        """Display only the rows of the given sections.
+
+        Optional arguments:
+            scIds: set -- IDs of the sections to display.
+                          If None, all "normal" sections are displayed.
+
+        Only the rows are rearranged; the columns remain unchanged.
+        The nodes of retained rows are kept, the nodes of added rows
+        are read from the model. Therefore, pending node changes
+        must be written back before.
+        """
+        if scIds == self._rowFilter:
+            return
+
+        self._rowFilter = scIds
+        self._relayout_rows()
+
+    def get_layout_cache(self):
+        """Return a dictionary with the table's measurements.
+
+        The dictionary can be serialized as JSON, and passed
+        to a new table for the same project, to skip measuring.
+        Only the widths of the texts used by this table are kept.
+        """
+        return dict(
+            font=self._font.actual(),
+            rowHeight=self._rowHeight,
+            textWidths=dict(self._textWidths),
         )
-        colorsHdBg = (
-            prefs['color_hd_bright'],
-            prefs['color_hd_dark'],
+
+    def get_node(self, scId, category, elemId):
+        """Modify a section according to a single node's state.
+
+        Positional arguments:
+            scId: str -- Section ID.
+            category: str -- Element category, e.g. CHARACTERS.
+            elemId: str -- Element ID.
+
+        The element ID lists are modified in place, so the model
+        does not notify its observers; this is up to the caller.
+        Return True, if the model has been modified.
+        """
+        return bool(self.get_nodes([(scId, category, elemId)]))
+
+    @instrumentation.timed('get_nodes')
+    def get_nodes(self, nodes=None, deltas=None):
+        """Modify the sections according to the node states.
+
+        Optional arguments:
+            nodes: iterable -- (section ID, category, element ID) tuples
+                               of the nodes to read. If None,
+                               all nodes of the built rows are read.
+            deltas: list -- If given with nodes, a delta tuple
+                            is appended for each node changed
+                            in the model, as stored in an EditLog.
+
+        Nodes of sections or elements deleted in the meantime
+        are skipped.
+        Notifying the model's observers is up to the caller.
+        Return a set with the IDs of the modified sections.
+        """
+        if nodes is not None:
+            return self._get_node_list(nodes, deltas)
+
+        # Membership indexes are ordered dictionaries with the IDs as keys.
+        # They provide O(1) lookups while keeping the order of the lists.
+        modifiedSections = set()
+        plotlineSections = {}
+        for plId in self._columns[PLOT_LINES]:
+            plotlineSections[plId] = dict.fromkeys(
+                self._novel.plotLines[plId].sections
+            )
+        for scId in self._relations.sectionIds:
+            if not scId in self._signatures:
+                # The row is not built yet.
+                continue
+
+            if self._is_chapter_row(scId):
+                continue
+
+            signature = self._get_section_signature(scId)
+            relatedColumns = set(
+                self._relations.get_columns(self._relations.rows[scId])
+            )
+            relations = self._get_relations(scId)
+            for category in CATEGORIES:
+                columns = self._columns[category]
+                if not columns:
+                    continue
+
+                elemIds = dict.fromkeys(relations[category])
+                for elemId, col in columns.items():
+                    if col in relatedColumns:
+                        elemIds.setdefault(elemId)
+                        if category == PLOT_LINES:
+                            plotlineSections[elemId].setdefault(scId)
+                    else:
+                        elemIds.pop(elemId, None)
+                        if category == PLOT_LINES:
+                            plotlineSections[elemId].pop(scId, None)
+                            self._disassociate_plot_points(scId, elemId)
+                # The lists are modified in place, as the setters
+                # would notify the model's observers.
+                if list(elemIds) != relations[category]:
+                    relations[category][:] = elemIds
+            self._signatures[scId] = self._get_section_signature(scId)
+            if self._signatures[scId] != signature:
+                modifiedSections.add(scId)
+        for plId, scIds in plotlineSections.items():
+            sections = self._novel.plotLines[plId].sections
+            if list(scIds) != sections:
+                sections[:] = scIds
+        return modifiedSections
+
+    @instrumentation.timed('refresh')
+    def refresh(self):
+        """Update the table according to the model, applying only changes.
+
+        Return True on success.
+        Return False, if the rows and columns changed beyond the
+        rebuild threshold; in this case, the table remains unchanged
+        and must be rebuilt.
+        """
+        # The plot points may have changed.
+        self._plotPointIndex = None
+
+        # Rows not yet built are left to the resumed progressive build.
+        building = self.cancel_build()
+
+        sections = self._get_row_ids()
+        categories = get_categories(self._novel)
+        columnKeys = []
+        for category, __, __, columnSpecs in categories:
+            for elemId, __, __ in columnSpecs:
+                columnKeys.append((category, elemId))
+
+        oldSections = self._relations.sectionIds
+        if sections == oldSections and columnKeys == self._columnKeys:
+            relayout = not self._patch_columns(categories)
+        else:
+            changes = (
+                len(set(sections).symmetric_difference(oldSections))
+                +len(set(columnKeys).symmetric_difference(self._columnKeys))
+            )
+            if changes > (
+                self.REBUILD_THRESHOLD * (len(sections) + len(columnKeys))
+            ):
+                return False
+
+            relayout = True
+
+        # Send the node changes to Tcl in one batch.
+        markerScripts = self._grid.markerScripts
+        self._grid.begin_update()
+        if relayout:
+            oldColumns = self._relations.columns
+            self._layout(sections, categories)
+            self._update_layout(oldColumns)
+
+        # Update the changed rows.
+        rowTitleChanged = False
+        for scId in self._relations.sectionIds:
+            signature = self._signatures.get(scId, None)
+            if signature is None and building:
+                continue
+
+            newSignature = self._get_row_signature(scId)
+            if signature == newSignature:
+                continue
+
+            if signature is not None and signature[0] != newSignature[0]:
+                row = self._relations.rows[scId]
+                self._rowTitleBand.replace_cell(
+                    0,
+                    row,
+                    *self._get_row_title(row, scId),
+                )
+                rowTitleChanged = True
+            self._set_row_nodes(scId)
+        self._grid.end_update()
+        self.markerScripts = self._grid.markerScripts - markerScripts
+        instrumentation.set_value(
+            'refresh marker scripts',
+            self.markerScripts,
         )
-        colorsHdFg = (
-            BLACK,
-            WHITE,
+
+        if relayout or rowTitleChanged:
+            self._set_extent()
+        if building:
+            self._buildRow = 0
+            self._buildJob = self._tableFrame.after(1, self._build_chunk)
+        return True
+
+    @instrumentation.timed('render')
+    def render(self, event=None):
+        """Draw the visible part of the table."""
+        x0, y0, x1, y1 = self._tableFrame.get_viewport()
+        self._grid.render(x0, y0, x1, y1)
+        self._rowTitleBand.render(y0, y1)
+        self._columnTitleBand.render(x0, x1)
+
+    @instrumentation.timed('set_nodes')
+    def set_nodes(self, onProgress=None):
+        """Loop through all nodes, setting states.
+
+        Optional arguments:
+            onProgress -- Callback function onProgress(rowsDone, rowCount).
+
+        If a progress callback is given, the rows are set progressively
+        in time-sliced chunks, and the callback is called after
+        each chunk. Otherwise, all rows are set at once.
+        """
+        self.cancel_build()
+        self._signatures = {}
+        if onProgress is None:
+            self._grid.begin_update()
+            for scId in self._relations.sectionIds:
+                self._set_row_nodes(scId)
+            self._grid.end_update()
+            return
+
+        self._onProgress = onProgress
+        self._buildRow = 0
+        self._build_chunk()
+
+    @instrumentation.timed('show_columns')
+    def show_columns(self, category):
+        """Show or hide a category's columns according to the settings.
+
+        Positional arguments:
+            category: str -- Element category, e.g. CHARACTERS.
+
+        Only the category's columns are rearranged; the rows and the
+        nodes of the other categories remain unchanged.
+        The nodes of a category are read from the model the first time
+        it is displayed. When hidden, they are kept up to date,
+        so that they can be displayed again without rebuilding.
+        """
+        categories = []
+        for categorySpec in self._categories:
+            if categorySpec[0] != category:
+                categories.append(categorySpec)
+        categorySpec = get_category(self._novel, category)
+        if categorySpec is not None:
+            categories.append(categorySpec)
+            categories.sort(key=lambda spec: CATEGORIES.index(spec[0]))
+        oldColumns = self._relations.columns
+        hiddenColumns = self._get_hidden_columns(categories)
+        self._set_matrix_layout(
+            self._relations.sectionIds,
+            categories,
+            hiddenColumns,
         )
-        category = 0
-        columns = []
-        col = 0
-        bgc = 1
+        self._layout_columns(categories, hiddenColumns)
+        self._grid.draw()
+        self._grid.begin_update()
+        self._update_layout(oldColumns)
+        self._grid.end_update()
+        self._set_extent()
 
-        #--- Section title column.
-        tk.Label(
-            master.topLeft,
-            text=_('Sections'),
-            bg=colorsHdBg[category % 2],
-            fg=colorsHdFg[category % 2],
-        ).pack(fill='x')
-        tk.Label(
-            master.topLeft,
-            bg=colorsBackground[1][1],
-            text=' ',
-        ).pack(fill='x')
+    def update_chapter_rows(self, chIds):
+        """Update the nodes of chapter rows in chapter mode.
+
+        Positional arguments:
+            chIds: iterable -- IDs of the chapters whose sections
+                               have changed in the section index.
+        """
+        self._grid.begin_update()
+        for chId in chIds:
+            if chId in self._signatures:
+                self._set_row_nodes(chId)
+        self._grid.end_update()
+
+    def update_sections(self, scIds):
+        """Update the nodes of section rows after the model has changed.
+
+        Positional arguments:
+            scIds: iterable -- IDs of the modified sections.
+
+        Only the nodes of the changed relations are touched.
+        Sections not displayed are skipped.
+        """
+        # The plot points may have changed.
+        self._plotPointIndex = None
+
+        self._grid.begin_update()
+        for scId in scIds:
+            if scId in self._signatures:
+                self._set_row_nodes(scId)
+        self._grid.end_update()
+
+    @instrumentation.timed('build_chunk')
+    def _build_chunk(self):
+        # Set the nodes of the next rows, until the time slice is over.
+        # Then schedule the next chunk.
+        self._buildJob = None
+        sectionIds = self._relations.sectionIds
+        deadline = time.perf_counter() + self.BUILD_TIME_SLICE
+        self._grid.begin_update()
+        while self._buildRow < len(sectionIds):
+            scId = sectionIds[self._buildRow]
+            self._buildRow += 1
+            if not scId in self._signatures:
+                self._set_row_nodes(scId)
+            if time.perf_counter() > deadline:
+                break
+
+        self._grid.end_update()
 
-        #--- Display titles of "normal" sections.
-        row = 0
-        self._plotlineNodes = {}
-        self._characterNodes = {}
-        self._locationNodes = {}
-        self._itemNodes = {}
-        self._sections = []
+        self._onProgress(self._buildRow, len(sectionIds))
+        if self._buildRow < len(sectionIds):
+            self._buildJob = self._tableFrame.after(1, self._build_chunk)
 
+    def _can_toggle(self, row):
+        # Chapter rows are aggregates; their nodes cannot be toggled.
+        return not self._is_chapter_row(self._relations.sectionIds[row])
+
+    def _disassociate_plot_points(self, scId, plId):
+        # Remove the section's plot points that belong to the plot line.
+        # Return a list with the IDs of the disassociated plot points.
+        sectionPlotPoints = self._get_plot_point_index().get(plId, {})
+        section = self._novel.sections[scId]
+        ppIds = []
+        for ppId in sectionPlotPoints.pop(scId, ()):
+            if section.scPlotPoints.get(ppId, None) == plId:
+                del section.scPlotPoints[ppId]
+                self._novel.plotPoints[ppId].sectionAssoc = None
+                # don't trigger the update here
+                ppIds.append(ppId)
+        return ppIds
+
+    def _fill_str(self, text):
+        # Return a string that is at least 7 characters long.
+        # Extend text with spaces so that it does not fall
+        # below the length of 7 characters.
+        # This is for column titles, to widen narrow columns.
+        while len(text) < 7:
+            text = f' {text} '
+        return text
+
+    def _get_column_layout(self, categories):
+        # Return a list of the column attributes:
+        # (title, hover text, fgColor, bgColor, nodeColor, width)
+        # The column widths are not yet adjusted to the category titles.
+        markerWidth = self._get_text_width(Node.marker)
+        titleColors = self._colorsBackground[self._relations.rowCount % 2]
+        columnLayout = []
+        for category, __, elements, columnSpecs in categories:
+            for elemId, title, hoverText in columnSpecs:
+                col = len(columnLayout)
+
+                # Uncolored titles contrast with the adjacent stripes.
+                fgColor, bgColor, nodeColor = (
+                    self._palette.get_element_colors(
+                        elements[elemId].color,
+                        titleColors[(col + 1) % 2],
+                    )
+                )
+                columnTitle = self._fill_str(title)
+                columnLayout.append((
+                    columnTitle,
+                    hoverText,
+                    fgColor,
+                    bgColor,
+                    nodeColor,
+                    max(self._get_text_width(columnTitle), markerWidth),
+                ))
+        return columnLayout
+
+    def _get_hidden_columns(self, categories):
+        # Return a list of (category, element ID) tuples:
+        # The columns that have been built, but are not displayed.
+        # Columns of deleted elements are dropped.
+        displayed = set()
+        for __, __, __, columnSpecs in categories:
+            for columnSpec in columnSpecs:
+                displayed.add(columnSpec[0])
+        elements = {
+            PLOT_LINES: self._novel.plotLines,
+            CHARACTERS: self._novel.characters,
+            LOCATIONS: self._novel.locations,
+            ITEMS: self._novel.items,
+        }
+        hiddenColumns = []
+        for category in CATEGORIES:
+            for elemId in self._columns[category]:
+                if elemId in elements[category] and not elemId in displayed:
+                    hiddenColumns.append((category, elemId))
+        return hiddenColumns
+
+    def _get_node_list(self, nodes, deltas):
+        # Modify the sections according to the given nodes' states.
+        # Return a set with the IDs of the modified sections.
+        # The plot lines' section lists are updated once per plot line.
+        # The list indexes of removed IDs are recorded for undoing,
+        # as if the IDs were removed one after the other.
+        elements = {
+            PLOT_LINES: self._novel.plotLines,
+            CHARACTERS: self._novel.characters,
+            LOCATIONS: self._novel.locations,
+            ITEMS: self._novel.items,
+        }
+        modifiedSections = set()
+        changes = []
+        plotlineNodes = {}
+        for scId, category, elemId in nodes:
+            # The model may have changed since the node was toggled.
+            if (
+                not scId in self._novel.sections
+                or not elemId in elements[category]
+            ):
+                continue
+
+            state = self._relations.is_related(scId, elemId)
+            elemIds = self._get_relations(scId)[category]
+            oldState = elemId in elemIds
+            elemIndex = None
+            if state and not oldState:
+                elemIds.append(elemId)
+                modifiedSections.add(scId)
+            elif not state and oldState:
+                elemIndex = elemIds.index(elemId)
+                del elemIds[elemIndex]
+                modifiedSections.add(scId)
+            changes.append(
+                (scId, category, elemId, oldState, state, elemIndex)
+            )
+            if category == PLOT_LINES:
+                plotlineNodes.setdefault(elemId, []).append((scId, state))
+
+        # Keep the plot lines' cross references consistent.
+        # {(section ID, plot line ID): IDs of disassociated plot points}
+        plotPoints = {}
+
+        # {(section ID, plot line ID): index in the plot line's sections}
+        sectionIndexes = {}
+        for plId, plotlineStates in plotlineNodes.items():
+            plotlineSections = self._novel.plotLines[plId].sections
+            scIds = dict.fromkeys(plotlineSections)
+            positions = None
+            removedPositions = []
+            for scId, state in plotlineStates:
+                if state and not scId in scIds:
+                    scIds[scId] = None
+                    modifiedSections.add(scId)
+                elif not state:
+                    if scId in scIds:
+                        if positions is None:
+                            positions = {}
+                            for i, sectionId in enumerate(plotlineSections):
+                                positions[sectionId] = i
+
+                        # Sections removed before shift the position.
+                        position = positions[scId]
+                        sectionIndexes[scId, plId] = position - bisect_left(
+                            removedPositions,
+                            position,
+                        )
+                        insort(removedPositions, position)
+                        del scIds[scId]
+                        modifiedSections.add(scId)
+                    plotPoints[scId, plId] = tuple(
+                        self._disassociate_plot_points(scId, plId)
+                    )
+            if list(scIds) != plotlineSections:
+                plotlineSections[:] = scIds
+        for scId in modifiedSections:
+            self._signatures[scId] = self._get_section_signature(scId)
+
+        if deltas is not None:
+            for scId, category, elemId, oldState, state, elemIndex in changes:
+                ppIds = plotPoints.get((scId, elemId), ())
+                if oldState != state or ppIds:
+                    deltas.append((
+                        category,
+                        scId,
+                        elemId,
+                        oldState,
+                        state,
+                        ppIds,
+                        (elemIndex, sectionIndexes.get((scId, elemId), None)),
+                    ))
+        return modifiedSections
+
+    def _get_note(self, row, col):
+        # Return the plot line note of a node as tooltip text.
+        # For chapter rows, return the number of related sections.
+        scId = self._relations.sectionIds[row]
+        if self._is_chapter_row(scId):
+            count = self._sectionIndex.get_chapter_counts(scId).get(
+                self._relations.elementIds[col],
+                0,
+            )
+            if not count:
+                return ''
+
+            chapterSize = self._sectionIndex.get_chapter_size(scId)
+            return f'{_("Sections")}: {count}/{chapterSize}'
+
+        plId = self._relations.elementIds[col]
+        if not plId in self._columns[PLOT_LINES]:
+            return ''
+
+        plNote = self._novel.sections[scId].plotlineNotes.get(plId, None)
+        if not plNote:
+            return ''
+
+        return self._wrap_note(plNote)
+
+    def _get_plot_point_index(self):
+        # Return a dictionary {plot line ID: {section ID: [plot point IDs]}}.
+        # The index covers all "normal" sections, not only the displayed
+        # ones. It is built on demand, and discarded on refresh.
+        if self._plotPointIndex is None:
+            self._plotPointIndex = {}
+            for scId in iter_sections(self._novel):
+                scPlotPoints = self._novel.sections[scId].scPlotPoints
+                for ppId, plId in scPlotPoints.items():
+                    self._plotPointIndex.setdefault(plId, {}).setdefault(
+                        scId,
+                        [],
+                    ).append(ppId)
+        return self._plotPointIndex
+
+    def _get_relations(self, scId):
+        # Return a dictionary with the section's element ID lists.
+        section = self._novel.sections[scId]
+        return {
+            PLOT_LINES: section.scPlotLines,
+            CHARACTERS: section.characters,
+            LOCATIONS: section.locations,
+            ITEMS: section.items,
+        }
+
+    def _get_row_ids(self):
+        # Return a list with the IDs of the rows to display.
+        # In chapter mode, these are the IDs of the chapters, each
+        # followed by its section IDs, if expanded. Chapters without
+        # sections to display are omitted.
+        if self._sectionIndex is None:
+            sections = []
+            for scId in iter_sections(self._novel):
+                if self._rowFilter is None or scId in self._rowFilter:
+                    sections.append(scId)
+            return sections
+
+        rowIds = []
         for chId in self._novel.tree.get_children(CH_ROOT):
+            sections = []
             for scId in self._novel.tree.get_children(chId):
-                bgr = row % 2
                 if self._novel.sections[scId].scType != 0:
                     continue
 
-                self._sections.append(scId)
-
-                #--- Initialize matrix section row dictionaries.
-                self._characterNodes[scId] = {}
-                self._locationNodes[scId] = {}
-                self._itemNodes[scId] = {}
-                self._plotlineNodes[scId] = {}
-
-                tk.Label(
-                    master.rowTitles,
-                    text=self._novel.sections[scId].title,
-                    bg=colorsBackground[bgr][1],
-                    justify='left',
-                    anchor='w',
-                ).pack(fill='x')
-                row += 1
-        bgr = row % 2
-        tk.Label(
-            master.rowTitles,
-            text=' ',
-            bg=colorsBackground[bgr][1],
-        ).pack(fill='x')
-        tk.Label(
-            master.rowTitles,
-            text=_('Sections'),
-            bg=colorsHdBg[category % 2],
-            fg=colorsHdFg[category % 2],
-        ).pack(fill='x')
+                if self._rowFilter is None or scId in self._rowFilter:
+                    sections.append(scId)
+            if not sections:
+                continue
 
-        #--- Plot line columns.
-        if self._novel.plotLines and prefs['show_plot_lines']:
-            category += 1
-            plotlineTitleWindow = ttk.Frame(master.columnTitles)
-            plotlineTitleWindow.pack(side='left', fill='both')
-            tk.Label(
-                plotlineTitleWindow,
-                text=_('Plot lines'),
-                bg=colorsHdBg[category % 2],
-                fg=colorsHdFg[category % 2],
-            ).pack(fill='x')
-            plotlineTypeColumn = ttk.Frame(master.display)
-            plotlineTypeColumn.pack(side='left', fill='both')
-            plotlineColumn = ttk.Frame(plotlineTypeColumn)
-            plotlineColumn.pack(fill='both')
-            for plId in self._novel.tree.get_children(PL_ROOT):
-                fgColor, bgColor, nodeColor = get_colors(
-                    self._novel.plotLines,
-                    plId,
-                    colorsBackground[bgr][bgc],
-                )
+            rowIds.append(chId)
+            if chId in self._expandedChapters:
+                rowIds.extend(sections)
+        return rowIds
 
-                # Display plot line titles.
-                row = 1
-                bgr = row % 2
-                bgc = col % 2
-                plotlineTitle = fill_str(self._novel.plotLines[plId].shortName)
-                hoverText = self._novel.plotLines[plId].title
-                pl = tk.Label(
-                    plotlineTitleWindow,
-                    text=plotlineTitle,
-                    fg=fgColor,
-                    bg=bgColor,
-                    justify='left',
-                    anchor='w',
-                )
-                pl.pack(side='left', fill='x', expand=True)
-                self._setHovertip(pl, hoverText)
-                row += 1
-
-                # Display plot line nodes.
-                columns.append(tk.Frame(plotlineColumn))
-                columns[col].pack(side='left', fill='both', expand=True)
-                for scId in self._plotlineNodes:
-                    bgr = row % 2
-                    node = Node(
-                        columns[col],
-                        colorFalse=colorsBackground[bgr][bgc],
-                        colorTrue=nodeColor,
-                    )
-                    node.pack(fill='x', expand=True)
-                    self._plotlineNodes[scId][plId] = node
-                    if self._novel.sections[scId].plotlineNotes.get(
-                        plId,
-                        None
-                    ):
-                        plNotes = textwrap.wrap(
-                            self._novel.sections[scId].plotlineNotes[plId],
-                            width=self.NOTE_WIDTH,
-                        )
-                        self._setHovertip(
-                            node,
-                            '\n'.join(plNotes),
-                        )
-                    row += 1
-                bgr = row % 2
-                pl = tk.Label(
-                    columns[col],
-                    text=plotlineTitle,
-                    fg=fgColor,
-                    bg=bgColor,
-                    justify='left',
-                    anchor='w'
-                )
-                pl.pack(fill='x', expand=True)
-                self._setHovertip(pl, hoverText)
-                col += 1
-            tk.Label(
-                plotlineTypeColumn,
-                text=_('Plot lines'),
-                bg=colorsHdBg[category % 2],
-                fg=colorsHdFg[category % 2],
-            ).pack(fill='x')
-
-        #--- Character columns.
-        if self._novel.characters and prefs['show_characters']:
-            category += 1
-            characterTypeColumn = ttk.Frame(master.display)
-            characterTypeColumn.pack(side='left', fill='both')
-            characterColumn = ttk.Frame(characterTypeColumn)
-            characterColumn.pack(fill='both')
-            characterTitleWindow = ttk.Frame(master.columnTitles)
-            characterTitleWindow.pack(side='left', fill='both')
-            tk.Label(
-                characterTitleWindow,
-                text=_('Characters'),
-                bg=colorsHdBg[category % 2],
-                fg=colorsHdFg[category % 2],
-            ).pack(fill='x')
-            for crId in self._novel.tree.get_children(CR_ROOT):
-                fgColor, bgColor, nodeColor = get_colors(
-                    self._novel.characters,
-                    crId,
-                    colorsBackground[bgr][bgc],
+    def _get_row_signature(self, rowId):
+        # Return a tuple with everything displayed for the row:
+        # title, and element IDs per category for sections,
+        # or the numbers of related sections per element for chapters.
+        if not self._is_chapter_row(rowId):
+            return self._get_section_signature(rowId)
+
+        counts = self._sectionIndex.get_chapter_counts(rowId)
+        return (
+            self._novel.chapters[rowId].title,
+            tuple(sorted(counts.items())),
+        )
+
+    def _get_row_title(self, row, rowId):
+        # Return a tuple (title, fgColor, bgColor) for a row title.
+        if not self._is_chapter_row(rowId):
+            return (
+                self._novel.sections[rowId].title,
+                Palette.BLACK,
+                self._colorsBackground[row % 2][1],
+            )
+
+        if rowId in self._expandedChapters:
+            title = f'▾ {self._novel.chapters[rowId].title}'
+        else:
+            title = f'▸ {self._novel.chapters[rowId].title}'
+        return title, self._colorsHdFg[1], self._colorsHdBg[1]
+
+    def _get_section_signature(self, scId):
+        # Return a tuple with everything displayed for the section:
+        # title, and element IDs per category.
+        # The plot line notes are retrieved on demand.
+        relations = self._get_relations(scId)
+        signature = [self._novel.sections[scId].title]
+        for category in CATEGORIES:
+            signature.append(tuple(relations[category]))
+        return tuple(signature)
+
+    def _get_text_width(self, text):
+        # Return the text width in pixels, measuring each text only once.
+        width = self._textWidths.get(text, None)
+        if width is None:
+            width = self._cachedWidths.pop(text, None)
+            if width is None:
+                width = (
+                    self._font.measure(text) + 2 * TitleBand.TEXT_PADDING
                 )
-                if (
-                    prefs['major_characters_only']
-                    and not self._novel.characters[crId].isMajor
-                ):
-                    continue
+            self._textWidths[text] = width
+        return width
 
-                # Display character titles.
-                row = 1
-                bgr = row % 2
-                bgc = col % 2
-                characterTitle = fill_str(self._novel.characters[crId].title)
-                hoverText = self._novel.characters[crId].fullName
-                if self._novel.characters[crId].aka:
-                    hoverText = (
-                        f'{hoverText}\n'
-                        f'({self._novel.characters[crId].aka})'
-                    )
-                cr = tk.Label(
-                    characterTitleWindow,
-                    text=characterTitle,
-                    fg=fgColor,
-                    bg=bgColor,
-                    justify='left',
-                    anchor='w',
+    def _is_chapter_row(self, rowId):
+        return (
+            self._sectionIndex is not None
+            and rowId in self._novel.chapters
+        )
+
+    def _layout(self, sections, categories):
+        # Arrange the rows and columns, and prepare the grid for drawing.
+        hiddenColumns = self._get_hidden_columns(categories)
+        self._set_matrix_layout(sections, categories, hiddenColumns)
+        self._layout_rows()
+        self._layout_columns(categories, hiddenColumns)
+        self._grid.draw()
+
+    def _layout_columns(self, categories, hiddenColumns):
+        # Add the displayed columns, and keep track of the hidden ones.
+        self._categories = categories
+        self._columnSpecs = self._get_column_layout(categories)
+        self._columnKeys = []
+        self._columns = {}
+        for category in CATEGORIES:
+            self._columns[category] = {}
+        self._grid.reset_columns()
+        self._columnTitleBand.reset()
+        for i, categorySpec in enumerate(categories):
+            category, categoryTitle, __, columnSpecs = categorySpec
+            hdFgColor = self._colorsHdFg[(i + 1) % 2]
+            hdBgColor = self._colorsHdBg[(i + 1) % 2]
+            if not columnSpecs:
+                continue
+
+            # Widen the columns, if the category title is wider.
+            firstCol = len(self._columnKeys)
+            lastCol = firstCol + len(columnSpecs) - 1
+            columnWidths = []
+            for col in range(firstCol, lastCol + 1):
+                columnWidths.append(self._columnSpecs[col][5])
+            extraWidth = (
+                self._get_text_width(categoryTitle) - sum(columnWidths)
+            )
+            if extraWidth > 0:
+                for j in range(len(columnWidths)):
+                    columnWidths[j] += extraWidth // len(columnWidths)
+                columnWidths[-1] += extraWidth % len(columnWidths)
+
+            # Add the title cells and the node columns.
+            x0 = self._grid.width
+            self._columnTitleBand.add_cell(
+                0,
+                x0,
+                x0 + sum(columnWidths),
+                categoryTitle,
+                hdFgColor,
+                hdBgColor,
+                anchor='center',
+            )
+            for j, columnSpec in enumerate(columnSpecs):
+                elemId = columnSpec[0]
+                title, hoverText, fgColor, bgColor, nodeColor, __ = (
+                    self._columnSpecs[firstCol + j]
                 )
-                cr.pack(side='left', fill='x', expand=True)
-                self._setHovertip(cr, hoverText)
-                row += 1
-
-                # Display character nodes.
-                columns.append(tk.Frame(characterColumn))
-                columns[col].pack(side='left', fill='both', expand=True)
-                for scId in self._characterNodes:
-                    bgr = row % 2
-                    node = Node(
-                        columns[col],
-                        colorFalse=colorsBackground[bgr][bgc],
-                        colorTrue=nodeColor,
-                    )
-                    node.pack(fill='x', expand=True)
-                    self._characterNodes[scId][crId] = node
-                    row += 1
-                bgr = row % 2
-                cr = tk.Label(
-                    columns[col],
-                    text=characterTitle,
-                    fg=fgColor,
-                    bg=bgColor,
-                    justify='left',
-                    anchor='w',
+                x0 = self._grid.width
+                self._columnTitleBand.add_cell(
+                    1,
+                    x0,
+                    x0 + columnWidths[j],
+                    title,
+                    fgColor,
+                    bgColor,
+                    hoverText=hoverText,
                 )
-                cr.pack(fill='x', expand=True)
-                self._setHovertip(cr, hoverText)
-                col += 1
-            tk.Label(
-                characterTypeColumn,
-                text=_('Characters'),
-                bg=colorsHdBg[category % 2],
-                fg=colorsHdFg[category % 2],
-            ).pack(fill='x')
-
-        #--- Location columns.
-        if self._novel.locations and prefs['show_locations']:
-            category += 1
-            locationTypeColumn = ttk.Frame(master.display)
-            locationTypeColumn.pack(side='left', fill='both')
-            locationColumn = ttk.Frame(locationTypeColumn)
-            locationColumn.pack(fill='both')
-            locationTitleWindow = ttk.Frame(master.columnTitles)
-            locationTitleWindow.pack(side='left', fill='both')
-            tk.Label(
-                locationTitleWindow,
-                text=_('Locations'),
-                bg=colorsHdBg[category % 2],
-                fg=colorsHdFg[category % 2],
-            ).pack(fill='x')
-            for lcId in self._novel.tree.get_children(LC_ROOT):
-                fgColor, bgColor, nodeColor = get_colors(
-                    self._novel.locations,
-                    lcId,
-                    colorsBackground[bgr][bgc],
+                col = self._grid.add_column(
+                    columnWidths[j],
+                    nodeColor,
+                    title,
+                    fgColor,
+                    bgColor,
+                    hoverText=hoverText,
                 )
+                self._columns[category][elemId] = col
+                self._columnKeys.append((category, elemId))
+            self._grid.add_category(
+                categoryTitle,
+                firstCol,
+                lastCol,
+                hdFgColor,
+                hdBgColor,
+            )
 
-                # Display location titles.
-                row = 1
-                bgr = row % 2
-                bgc = col % 2
-                locationTitle = fill_str(self._novel.locations[lcId].title)
-                tk.Label(
-                    locationTitleWindow,
-                    text=locationTitle,
-                    fg=fgColor,
-                    bg=bgColor,
-                    justify='left',
-                    anchor='w',
-                ).pack(side='left', fill='x', expand=True)
-                row += 1
-
-                # Display location nodes.
-                columns.append(tk.Frame(locationColumn))
-                columns[col].pack(side='left', fill='both', expand=True)
-                for scId in self._locationNodes:
-                    bgr = row % 2
-                    node = Node(
-                        columns[col],
-                        colorFalse=colorsBackground[bgr][bgc],
-                        colorTrue=nodeColor,
-                    )
-                    node.pack(fill='x', expand=True)
-                    self._locationNodes[scId][lcId] = node
-                    row += 1
-                bgr = row % 2
-                tk.Label(
-                    columns[col],
-                    text=locationTitle,
-                    fg=fgColor,
-                    bg=bgColor,
-                    justify='left',
-                    anchor='w',
-                ).pack(fill='x', expand=True)
-                col += 1
-            tk.Label(
-                locationTypeColumn,
-                text=_('Locations'),
-                bg=colorsHdBg[category % 2],
-                fg=colorsHdFg[category % 2],
-            ).pack(fill='x')
-
-        #--- Item columns.
-        if self._novel.items and prefs['show_items']:
-            category += 1
-            itemTypeColumn = ttk.Frame(master.display)
-            itemTypeColumn.pack(side='left', fill='both')
-            itemColumn = ttk.Frame(itemTypeColumn)
-            itemColumn.pack(fill='both')
-            itemTitleWindow = ttk.Frame(master.columnTitles)
-            itemTitleWindow.pack(side='left', fill='both')
-            tk.Label(
-                itemTitleWindow,
-                text=_('Items'),
-                bg=colorsHdBg[category % 2],
-                fg=colorsHdFg[category % 2],
-            ).pack(fill='x')
-            for itId in self._novel.tree.get_children(IT_ROOT):
-                fgColor, bgColor, nodeColor = get_colors(
-                    self._novel.items,
-                    itId,
-                    colorsBackground[bgr][bgc],
-                )
+        # The hidden columns' node states are kept behind the displayed ones.
+        col = len(self._columnKeys)
+        for category, elemId in hiddenColumns:
+            self._columns[category][elemId] = col
+            col += 1
+
+    def _layout_rows(self):
+        # Add the row titles.
+        sections = self._relations.sectionIds
+
+        #--- Rows with the titles of "normal" sections.
+        self._rowTitleBand.reset()
+        rowHeight = self._rowHeight
+        for row, scId in enumerate(sections):
+            self._rowTitleBand.add_cell(
+                0,
+                row * rowHeight,
+                (row + 1) * rowHeight,
+                *self._get_row_title(row, scId),
+            )
+        row = len(sections)
+        self._rowTitleBand.add_cell(
+            0,
+            row * rowHeight,
+            (row + 1) * rowHeight,
+            ' ',
+            Palette.BLACK,
+            self._colorsBackground[row % 2][1],
+        )
+        row += 1
+        self._rowTitleBand.add_cell(
+            0,
+            row * rowHeight,
+            (row + 1) * rowHeight,
+            _('Sections'),
+            self._colorsHdFg[0],
+            self._colorsHdBg[0],
+            anchor='center',
+        )
+        self._grid.rowCount = len(sections)
+
+    def _on_row_title_click(self, event):
+        # Expand or collapse the chapter row under the pointer.
+        canvas = self._tableFrame.rowTitles
+        cell = self._rowTitleBand.cell_at(
+            canvas.canvasx(event.x),
+            canvas.canvasy(event.y),
+        )
+        if cell is None:
+            return
+
+        row = cell[1]
+        if row >= self._relations.rowCount:
+            return
+
+        chId = self._relations.sectionIds[row]
+        if not self._is_chapter_row(chId):
+            return
+
+        expand = not chId in self._expandedChapters
+        if self._onExpand is not None:
+            self._onExpand(chId, expand)
+        else:
+            self.expand_chapter(chId, expand)
+
+    @instrumentation.timed('toggle')
+    def _on_toggle(self, row, col):
+        # Pass the toggled node's identity to the callback.
+        scId = self._relations.sectionIds[row]
+        if not scId in self._signatures:
+            # The row is not built yet: Toggle the model's state.
+            self._set_row_nodes(scId)
+            self._grid.set_state(row, col, not self._relations.get(row, col))
+        if self._onToggle is not None:
+            category, elemId = self._columnKeys[col]
+            self._onToggle(scId, category, elemId)
 
-                # Display item titles.
-                row = 1
-                bgr = row % 2
-                bgc = col % 2
-                itemTitle = fill_str(self._novel.items[itId].title)
-                tk.Label(
-                    itemTitleWindow,
-                    text=itemTitle,
-                    fg=fgColor,
-                    bg=bgColor,
-                    justify='left',
-                    anchor='w',
-                ).pack(side='left', fill='x', expand=True)
-                row += 1
-
-                # Display item nodes.
-                columns.append(tk.Frame(itemColumn))
-                columns[col].pack(side='left', fill='both', expand=True)
-                for scId in self._itemNodes:
-                    bgr = row % 2
-                    node = Node(
-                        columns[col],
-                        colorFalse=colorsBackground[bgr][bgc],
-                        colorTrue=nodeColor,
+    def _patch_columns(self, categories):
+        # Update the titles and colors of changed columns.
+        # Return False, if a column width has changed.
+        columnLayout = self._get_column_layout(categories)
+        for col, columnSpec in enumerate(columnLayout):
+            if columnSpec == self._columnSpecs[col]:
+                continue
+
+            if columnSpec[5] != self._columnSpecs[col][5]:
+                return False
+
+            title, hoverText, fgColor, bgColor, nodeColor, __ = columnSpec
+            self._columnTitleBand.replace_cell(
+                1,
+                col,
+                title,
+                fgColor,
+                bgColor,
+                hoverText=hoverText,
+            )
+            self._grid.replace_column(
+                col,
+                nodeColor,
+                title,
+                fgColor,
+                bgColor,
+                hoverText=hoverText,
+            )
+            self._columnSpecs[col] = columnSpec
+        return True
+
+    def _relayout_rows(self):
+        # Rearrange the rows, keeping the columns.
+        # The nodes of retained rows are kept,
+        # the nodes of added rows are read from the model.
+        building = self.cancel_build()
+        self._relations.set_layout(
+            self._get_row_ids(),
+            self._relations.elementIds,
+        )
+
+        # As on refresh, the plot point index is rebuilt on demand.
+        self._plotPointIndex = None
+        self._layout_rows()
+        self._grid.draw()
+
+        # The uncolored column titles depend on the number of rows.
+        self._patch_columns(self._categories)
+
+        for scId in list(self._signatures):
+            if not scId in self._relations.rows:
+                del self._signatures[scId]
+        if building:
+            self._buildRow = 0
+            self._buildJob = self._tableFrame.after(1, self._build_chunk)
+        else:
+            self._grid.begin_update()
+            for scId in self._relations.sectionIds:
+                if not scId in self._signatures:
+                    self._set_row_nodes(scId)
+            self._grid.end_update()
+        self._set_extent()
+
+    def _set_chapter_nodes(self, chId):
+        # Set the states of a chapter row's nodes:
+        # True, if any of the chapter's sections is related.
+        row = self._relations.rows[chId]
+        relatedColumns = set()
+        for elemId in self._sectionIndex.get_chapter_counts(chId):
+            col = self._relations.columns.get(elemId, None)
+            if col is not None:
+                relatedColumns.add(col)
+        for col in relatedColumns.symmetric_difference(
+            self._relations.get_columns(row)
+        ):
+            self._grid.set_state(row, col, col in relatedColumns)
+        self._signatures[chId] = self._get_row_signature(chId)
+
+    def _set_column_nodes(self, columnKeys):
+        # Set the states of newly displayed columns' nodes.
+        # Positional arguments:
+        #     columnKeys: list of (category, element ID) tuples.
+        newColumns = {}
+        for category, elemId in columnKeys:
+            newColumns.setdefault(category, set()).add(elemId)
+        for scId in self._relations.sectionIds:
+            row = self._relations.rows[scId]
+            if self._is_chapter_row(scId):
+                relations = self._sectionIndex.get_chapter_counts(scId)
+                for category, elemIds in newColumns.items():
+                    for elemId in elemIds.intersection(relations):
+                        self._grid.set_state(
+                            row,
+                            self._columns[category][elemId],
+                            True,
+                        )
+                continue
+
+            relations = self._get_relations(scId)
+            for category, elemIds in newColumns.items():
+                for elemId in elemIds.intersection(relations[category]):
+                    self._grid.set_state(
+                        row,
+                        self._columns[category][elemId],
+                        True,
                     )
-                    node.pack(fill='x', expand=True)
-                    self._itemNodes[scId][itId] = node
-                    row += 1
-                bgr = row % 2
-                tk.Label(
-                    columns[col],
-                    text=itemTitle,
-                    fg=fgColor,
-                    bg=bgColor,
-                    justify='left',
-                    anchor='w',
-                ).pack(fill='x', expand=True)
-                col += 1
-            tk.Label(
-                itemTypeColumn,
-                text=_('Items'),
-                bg=colorsHdBg[category % 2],
-                fg=colorsHdFg[category % 2],
-            ).pack(fill='x')
-
-    def set_nodes(self):
-        """Loop through all nodes, setting states."""
-        for scId in self._sections:
-
-            # Plot lines.
-            if prefs['show_plot_lines']:
-                for plId in self._novel.plotLines:
-                    self._plotlineNodes[scId][plId].state = (
-                        plId in self._novel.sections[scId].scPlotLines)
-
-            # Characters.
-            if prefs['show_characters']:
-                for crId in self._novel.characters:
-                    if (
-                        prefs['major_characters_only']
-                        and not self._novel.characters[crId].isMajor
-                    ):
-                        continue
-
-                    self._characterNodes[scId][crId].state = (
-                        crId in self._novel.sections[scId].characters)
-
-            # Locations.
-            if prefs['show_locations']:
-                for lcId in self._novel.locations:
-                    self._locationNodes[scId][lcId].state = (
-                        lcId in self._novel.sections[scId].locations)
-
-            # Items.
-            if prefs['show_items']:
-                for itId in self._novel.items:
-                    self._itemNodes[scId][itId].state = (
-                        itId in self._novel.sections[scId].items)
-
-    def get_nodes(self):
-        """Modify the sections according to the node states."""
-
-        def get_plot_line_node(plId, scId):
-            plotlineSections = self._novel.plotLines[plId].sections
-            if self._plotlineNodes[scId][plId].state:
-                if not plId in self._novel.sections[scId].scPlotLines:
-                    self._novel.sections[scId].scPlotLines.append(plId)
-                if not scId in plotlineSections:
-                    plotlineSections.append(scId)
-            else:
-                if plId in self._novel.sections[scId].scPlotLines:
-                    self._novel.sections[scId].scPlotLines.remove(plId)
-                if scId in plotlineSections:
-                    plotlineSections.remove(scId)
-                for ppId in list(self._novel.sections[scId].scPlotPoints):
-                    if (
-                        self._novel.sections[scId].scPlotPoints[ppId]
-                        == plId
-                    ):
-                        del self._novel.sections[scId].scPlotPoints[ppId]
-                        self._novel.plotPoints[ppId].sectionAssoc = None
-                        # don't trigger the update here
-            self._novel.plotLines[plId].sections = plotlineSections
-
-        def get_character_node(crId, scCharacters):
-            if (
-                prefs['major_characters_only']
-                and not self._novel.characters[crId].isMajor
+
+    def _set_extent(self):
+        # Set the scroll region; this triggers rendering.
+        rowTitleWidth = self._get_text_width(_('Sections'))
+        for row, scId in enumerate(self._relations.sectionIds):
+            rowTitleWidth = max(
+                rowTitleWidth,
+                self._get_text_width(self._get_row_title(row, scId)[0]),
+            )
+        if rowTitleWidth != self._rowTitleBand.thickness:
+            self._rowTitleBand.thickness = rowTitleWidth
+            self._rowTitleBand.clear()
+        self._tableFrame.set_extent(
+            rowTitleWidth,
+            2 * self._rowHeight,
+            self._grid.width,
+            self._grid.height,
+        )
+
+    def _set_matrix_layout(self, sections, categories, hiddenColumns):
+        # Arrange the relation matrix: displayed columns first.
+        elementIds = []
+        for __, __, __, columnSpecs in categories:
+            for columnSpec in columnSpecs:
+                elementIds.append(columnSpec[0])
+        for __, elemId in hiddenColumns:
+            elementIds.append(elemId)
+        self._relations.set_layout(sections, elementIds)
+
+    def _set_row_nodes(self, scId):
+        # Set the states of the section's nodes, if changed.
+        if self._is_chapter_row(scId):
+            self._set_chapter_nodes(scId)
+            return
+
+        oldSignature = self._signatures.get(scId, None)
+        signature = self._get_section_signature(scId)
+        row = self._relations.rows[scId]
+        if oldSignature is None:
+            # Compare the whole row with the element ID lists.
+            relatedColumns = set()
+            for i, category in enumerate(CATEGORIES):
+                columns = self._columns[category]
+                for elemId in signature[i + 1]:
+                    col = columns.get(elemId, None)
+                    if col is not None:
+                        relatedColumns.add(col)
+            for col in relatedColumns.symmetric_difference(
+                self._relations.get_columns(row)
             ):
-                return
-
-            if self._characterNodes[scId][crId].state:
-                if not crId in scCharacters:
-                    scCharacters.append(crId)
-            elif crId in scCharacters:
-                scCharacters.remove(crId)
-
-        for scId in self._sections:
-
-            # Plot lines.
-            if prefs['show_plot_lines']:
-                for plId in self._novel.plotLines:
-                    get_plot_line_node(plId, scId)
-
-            # Characters.
-            if prefs['show_characters']:
-                scCharacters = self._novel.sections[scId].characters
-                # this keeps the order
-                for crId in self._novel.characters:
-                    get_character_node(crId, scCharacters)
-                self._novel.sections[scId].characters = scCharacters
-
-            # Locations.
-            if prefs['show_locations']:
-                scLocations = self._novel.sections[scId].locations
-                for lcId in self._novel.locations:
-                    if self._locationNodes[scId][lcId].state:
-                        if not lcId in scLocations:
-                            scLocations.append(lcId)
-                    elif lcId in scLocations:
-                        scLocations.remove(lcId)
-                self._novel.sections[scId].locations = scLocations
-
-            # Items.
-            if prefs['show_items']:
-                scItems = self._novel.sections[scId].items
-                for itId in self._novel.items:
-                    if self._itemNodes[scId][itId].state:
-                        if not itId in scItems:
-                            scItems.append(itId)
-                    elif itId in scItems:
-                        scItems.remove(itId)
-                self._novel.sections[scId].items = scItems
+                self._grid.set_state(row, col, col in relatedColumns)
+        else:
+            # Compare the changed element ID lists.
+            for i, category in enumerate(CATEGORIES):
+                if oldSignature[i + 1] == signature[i + 1]:
+                    continue
+
+                columns = self._columns[category]
+                elemIds = set(signature[i + 1])
+                for elemId in elemIds.symmetric_difference(
+                    oldSignature[i + 1]
+                ):
+                    col = columns.get(elemId, None)
+                    if col is not None:
+                        self._grid.set_state(row, col, elemId in elemIds)
+        self._signatures[scId] = signature
+
+    def _set_up(self, master):
+        # Create the matrix components on the table frame.
+        self._palette = Palette(master)
+        self._colorsBackground = self._palette.background
+        self._colorsHdBg = self._palette.headerBackground
+        self._colorsHdFg = self._palette.headerForeground
+
+        #--- Section title column.
+        sectionsLabel = tk.Label(
+            master.topLeft,
+            text=_('Sections'),
+            bg=self._colorsHdBg[0],
+            fg=self._colorsHdFg[0],
+        )
+        sectionsLabel.pack(fill='x')
+        tk.Label(
+            master.topLeft,
+            bg=self._colorsBackground[1][1],
+            text=' ',
+        ).pack(fill='x')
+        self._font = nametofont('TkDefaultFont')
+        layoutCache = self._layoutCache
+        self._layoutCache = None
+        if layoutCache and layoutCache.get('font') == self._font.actual():
+            # Lay out the table with the measurements of the last session.
+            self._rowHeight = layoutCache['rowHeight']
+            self._cachedWidths = dict(layoutCache['textWidths'])
+        else:
+            self._rowHeight = sectionsLabel.winfo_reqheight()
 
+        #--- The node grid and the title bands, sharing one tooltip.
+        self._tableFrame = master
+        tooltip = CanvasTooltip()
+        self._grid = NodeGrid(
+            master.display,
+            self._rowHeight,
+            self._colorsBackground,
+            self._relations,
+            onToggle=self._on_toggle,
+            canToggle=self._can_toggle,
+            getNote=self._get_note,
+            tooltip=tooltip,
+        )
+        self._rowTitleBand = TitleBand(master.rowTitles, True, 0)
+        self._columnTitleBand = TitleBand(
+            master.columnTitles,
+            False,
+            self._rowHeight,
+        )
+        tooltip.add_canvas(
+            master.columnTitles,
+            self._columnTitleBand.cell_at,
+            self._columnTitleBand.get_hover_text,
+        )
+        master.rowTitles.bind(MOUSE.EXPAND_ROW, self._on_row_title_click)
+        master.bind('<<ViewChanged>>', self.render)
+
+    def _update_layout(self, oldColumns):
+        # Adapt the nodes to a new layout.
+        # The relations are kept by the matrix.
+        for scId in list(self._signatures):
+            if not scId in self._relations.rows:
+                del self._signatures[scId]
+
+        # Read the nodes of new columns from the model.
+        newColumns = []
+        for category in CATEGORIES:
+            for elemId in self._columns[category]:
+                if not elemId in oldColumns:
+                    newColumns.append((category, elemId))
+        if newColumns:
+            self._set_column_nodes(newColumns)
+
+    @staticmethod
+    @lru_cache(maxsize=NOTE_CACHE_SIZE)
+    def _wrap_note(plNote):
+        # Return the note wrapped for the tooltip; the result is cached.
+        return '\n'.join(
+            textwrap.wrap(plNote, width=RelationsTable.NOTE_WIDTH)
+        )
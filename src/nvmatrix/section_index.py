@@ -0,0 +1,249 @@
+"""Provide a class for an inverted index of the sections.
+
+Copyright (c) Peter Triesberger
+For further information see https://github.com/peter88213/nv_matrix
+License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
+"""
+import re
+
+from nvlib.novx_globals import CH_ROOT
+
+
+class SectionIndex:
+    """An inverted index for filtering the "normal" sections.
+
+    The index maps chapters, related elements, and title words
+    to sets of section IDs. Each section's entry holds its
+    chapter, lowercase title, and related element IDs;
+    on update, only the sections whose entries have changed
+    are reindexed.
+    Per chapter, the index also counts the sections related
+    to each element, so that the chapters can be displayed
+    as aggregated rows.
+
+    A title is searched by substring. The words of the search text
+    narrow down the candidates via the title words containing them;
+    only the candidates' titles are compared with the whole text.
+
+    The index does not depend on tkinter.
+    """
+    WORD_PATTERN = re.compile(r'\w+')
+
+    def __init__(self, novel):
+        """Build the index.
+
+        Positional arguments:
+            novel: Novel -- Project reference.
+        """
+        self._novel = novel
+
+        # {section ID: (chapter ID, lowercase title, element IDs)}
+        self._entries = {}
+
+        # {key: set of section IDs}
+        self._chapterSections = {}
+        self._elementSections = {}
+        self._wordSections = {}
+
+        # {chapter ID: {element ID: number of related sections}}
+        self._chapterCounts = {}
+
+        # {search word: list of the title words containing it}
+        # The cache is cleared when the title words change.
+        self._matchingWords = {}
+
+        self.update()
+
+    @property
+    def sectionCount(self):
+        return len(self._entries)
+
+    def find(self, chId=None, text='', elemIds=()):
+        """Return a set with the IDs of the matching sections.
+
+        Optional arguments:
+            chId: str -- ID of the chapter containing the sections.
+            text: str -- Substring of the section titles.
+            elemIds: iterable -- IDs of elements related to
+                                 each of the sections.
+
+        The search is case-insensitive.
+        The criteria not given match all sections.
+        """
+        candidates = None
+        if chId is not None:
+            candidates = self._chapterSections.get(chId, set())
+        for elemId in elemIds:
+            sections = self._elementSections.get(elemId, set())
+            if candidates is None:
+                candidates = sections
+            else:
+                candidates = candidates.intersection(sections)
+        text = text.lower()
+        words = self.WORD_PATTERN.findall(text)
+        for word in words:
+            sections = set()
+            for titleWord in self._get_matching_words(word):
+                sections.update(self._wordSections[titleWord])
+            if candidates is None:
+                candidates = sections
+            else:
+                candidates = candidates.intersection(sections)
+        if candidates is None:
+            candidates = self._entries.keys()
+        if text and words != [text]:
+            # Compare the candidates' titles with the whole text.
+            matches = set()
+            for scId in candidates:
+                if text in self._entries[scId][1]:
+                    matches.add(scId)
+            return matches
+
+        return set(candidates)
+
+    def get_chapter_counts(self, chId):
+        """Return a dictionary {element ID: number of related sections}.
+
+        Positional arguments:
+            chId: str -- Chapter ID.
+
+        Only the chapter's "normal" sections are counted.
+        The caller must not modify the dictionary.
+        """
+        return self._chapterCounts.get(chId, {})
+
+    def get_chapter_size(self, chId):
+        """Return the number of the chapter's "normal" sections."""
+        return len(self._chapterSections.get(chId, ()))
+
+    def update(self):
+        """Reindex the sections that have changed in the model.
+
+        Sections that have been deleted or changed into
+        "non-normal" sections are removed from the index.
+        Return a set with the IDs of the chapters whose sections
+        have changed.
+        """
+        sections = {}
+        for chId in self._novel.tree.get_children(CH_ROOT):
+            for scId in self._novel.tree.get_children(chId):
+                if self._novel.sections[scId].scType == 0:
+                    sections[scId] = chId
+        changedChapters = set()
+        for scId in list(self._entries):
+            if not scId in sections:
+                changedChapters.add(self._entries[scId][0])
+                self._remove_entry(scId)
+        for scId, chId in sections.items():
+            changedChapters.update(self._update_entry(scId, chId))
+        return changedChapters
+
+    def update_sections(self, scIds):
+        """Reindex the titles and relations of the given sections.
+
+        Positional arguments:
+            scIds: iterable -- IDs of indexed sections.
+
+        The sections are kept in their chapters.
+        Use this after changing sections, e.g. by writing back nodes.
+        Return a set with the IDs of the chapters whose sections
+        have changed.
+        """
+        changedChapters = set()
+        for scId in scIds:
+            entry = self._entries.get(scId, None)
+            if entry is not None:
+                changedChapters.update(self._update_entry(scId, entry[0]))
+        return changedChapters
+
+    def _add_entry(self, scId, entry):
+        # Add the section to the index maps.
+        chId, title, elemIds = entry
+        self._entries[scId] = entry
+        self._chapterSections.setdefault(chId, set()).add(scId)
+        chapterCounts = self._chapterCounts.setdefault(chId, {})
+        for elemId in set(elemIds):
+            self._elementSections.setdefault(elemId, set()).add(scId)
+            chapterCounts[elemId] = chapterCounts.get(elemId, 0) + 1
+        for word in self.WORD_PATTERN.findall(title):
+            sections = self._wordSections.get(word, None)
+            if sections is None:
+                sections = self._wordSections[word] = set()
+                self._matchingWords.clear()
+            sections.add(scId)
+
+    def _get_entry(self, scId, chId):
+        # Return a tuple (chapter ID, lowercase title, element IDs).
+        section = self._novel.sections[scId]
+        elemIds = []
+        for elemIdList in (
+            section.scPlotLines,
+            section.characters,
+            section.locations,
+            section.items,
+        ):
+            elemIds.extend(elemIdList)
+        return chId, (section.title or '').lower(), tuple(elemIds)
+
+    def _get_matching_words(self, word):
+        # Return a list of the title words containing the search word.
+        # While typing, the search word grows, so only the title words
+        # matching the shorter word need to be searched.
+        matchingWords = self._matchingWords.get(word, None)
+        if matchingWords is not None:
+            return matchingWords
+
+        titleWords = self._matchingWords.get(word[:-1], self._wordSections)
+        matchingWords = []
+        for titleWord in titleWords:
+            if word in titleWord:
+                matchingWords.append(titleWord)
+        self._matchingWords[word] = matchingWords
+        return matchingWords
+
+    def _remove_entry(self, scId):
+        # Remove the section from the index maps.
+        chId, title, elemIds = self._entries.pop(scId)
+        self._discard(self._chapterSections, chId, scId)
+        chapterCounts = self._chapterCounts.get(chId, {})
+        for elemId in set(elemIds):
+            self._discard(self._elementSections, elemId, scId)
+            chapterCounts[elemId] -= 1
+            if not chapterCounts[elemId]:
+                del chapterCounts[elemId]
+        if not chapterCounts:
+            self._chapterCounts.pop(chId, None)
+        for word in self.WORD_PATTERN.findall(title):
+            if self._discard(self._wordSections, word, scId):
+                self._matchingWords.clear()
+
+    def _update_entry(self, scId, chId):
+        # Reindex the section, if its entry has changed.
+        # Return a tuple with the IDs of the affected chapters.
+        entry = self._get_entry(scId, chId)
+        oldEntry = self._entries.get(scId, None)
+        if entry == oldEntry:
+            return ()
+
+        if oldEntry is None:
+            self._add_entry(scId, entry)
+            return (chId,)
+
+        self._remove_entry(scId)
+        self._add_entry(scId, entry)
+        return (oldEntry[0], chId)
+
+    @staticmethod
+    def _discard(indexMap, key, scId):
+        # Remove a section ID from an index map's set.
+        # Drop the key with the last section ID and return True.
+        sections = indexMap.get(key, None)
+        if sections is None:
+            return False
+
+        sections.discard(scId)
+        if sections:
+            return False
+
+        del indexMap[key]
+        return True
@@ -0,0 +1,200 @@
+"""Provide a class for a band of title cells drawn on a canvas.
+
+Copyright (c) Peter Triesberger
+For further information see https://github.com/peter88213/nv_matrix
+License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
+"""
+from bisect import bisect_left
+from bisect import bisect_right
+
+from nvmatrix.canvas_items import CanvasItems
+from nvmatrix.item_pool import ItemPool
+
+
+class TitleBand:
+    """A band of title cells, drawn as items on a canvas.
+
+    The cells are arranged along the band's axis in one or more levels.
+    A horizontal band's levels are stacked from top to bottom,
+    a vertical band's levels from left to right.
+    Only the cells within the rendered range are drawn; their items
+    are recycled when the range changes, and parked in an ItemPool
+    when the cells are reset.
+    """
+    OVERSCAN = 4
+    TEXT_PADDING = 2
+
+    def __init__(self, canvas, vertical, thickness, offset=0, pool=None):
+        """Set up an empty band.
+
+        Positional arguments:
+            canvas: tk.Canvas -- The canvas to draw on.
+            vertical: Boolean -- If True, the cells are arranged
+                                 from top to bottom.
+            thickness: int -- Cross-axis size of a level in pixels.
+
+        Optional arguments:
+            offset: int -- Cross-axis position of the first level.
+            pool: ItemPool -- Pool shared with other items on the canvas.
+        """
+        self._canvas = canvas
+        self._vertical = vertical
+        self.thickness = thickness
+        self.offset = offset
+
+        # Per level: list of cell start positions, list of cells.
+        self._starts = []
+        self._cells = []
+
+        if pool is None:
+            pool = ItemPool(canvas)
+        self._items = CanvasItems(
+            canvas,
+            self._create_cell,
+            self._place_cell,
+            pool=pool,
+            kind='titleCell',
+        )
+
+    def add_cell(
+            self,
+            level,
+            start,
+            end,
+            text,
+            fgColor,
+            bgColor,
+            anchor='w',
+            hoverText='',
+    ):
+        """Append a cell to a level.
+
+        Positional arguments:
+            level: int -- Level index.
+            start: int -- Axis position of the cell's beginning.
+            end: int -- Axis position of the cell's end.
+            text: str -- Title text.
+            fgColor: str -- Text color.
+            bgColor: str -- Background color.
+
+        Optional arguments:
+            anchor: str -- 'w' for left-aligned, 'center' for centered text.
+            hoverText: str -- Tooltip text.
+
+        Cells of a level must be appended in the order of their positions.
+        """
+        while len(self._cells) <= level:
+            self._starts.append([])
+            self._cells.append([])
+        self._starts[level].append(start)
+        self._cells[level].append(
+            (start, end, text, fgColor, bgColor, anchor, hoverText)
+        )
+
+    def cell_at(self, x, y):
+        """Return a (level, index) tuple for the canvas coordinates x, y.
+
+        Return None, if there is no cell at this position.
+        """
+        if self._vertical:
+            pos, crossPos = y, x
+        else:
+            pos, crossPos = x, y
+        level = int((crossPos - self.offset) // self.thickness)
+        if level < 0 or level >= len(self._cells):
+            return None
+
+        index = bisect_right(self._starts[level], pos) - 1
+        if index < 0 or self._cells[level][index][1] <= pos:
+            return None
+
+        return level, index
+
+    def clear(self):
+        """Delete all cell items."""
+        self._items.clear()
+
+    def reset(self):
+        """Delete all cells and their items."""
+        self._items.clear()
+        self._starts = []
+        self._cells = []
+
+    def replace_cell(self, level, index, text, fgColor, bgColor, hoverText=''):
+        """Change a cell's title and colors, keeping its position."""
+        start, end, __, __, __, anchor, __ = self._cells[level][index]
+        self._cells[level][index] = (
+            start, end, text, fgColor, bgColor, anchor, hoverText
+        )
+        items = self._items.get((level, index))
+        if items is not None:
+            self._place_cell(items, (level, index))
+
+    def get_hover_text(self, cell):
+        return self._get_cell(cell)[6]
+
+    def render(self, first, last):
+        """Draw the cells within the axis range from first to last."""
+        keys = set()
+        for level, starts in enumerate(self._starts):
+            firstIndex = max(
+                bisect_right(starts, first) - 1 - self.OVERSCAN,
+                0,
+            )
+            lastIndex = min(
+                bisect_left(starts, last) + self.OVERSCAN,
+                len(starts),
+            )
+            for index in range(firstIndex, lastIndex):
+                keys.add((level, index))
+        self._items.update(keys)
+
+    def _create_cell(self, key):
+        x0, y0, x1, y1, x, y = self._get_geometry(key)
+        __, __, title, fgColor, bgColor, anchor, __ = self._get_cell(key)
+        rect = self._canvas.create_rectangle(
+            x0, y0, x1, y1,
+            fill=bgColor,
+            width=0,
+        )
+        text = self._canvas.create_text(
+            x, y,
+            text=title,
+            fill=fgColor,
+            anchor=anchor,
+        )
+        return rect, text
+
+    def _get_cell(self, key):
+        level, index = key
+        return self._cells[level][index]
+
+    def _get_geometry(self, key):
+        # Return the cell's rectangle and the text position.
+        level = key[0]
+        start, end, __, __, __, anchor, __ = self._get_cell(key)
+        crossStart = self.offset + level * self.thickness
+        crossEnd = crossStart + self.thickness
+        if self._vertical:
+            x0, y0, x1, y1 = crossStart, start, crossEnd, end
+        else:
+            x0, y0, x1, y1 = start, crossStart, end, crossEnd
+        if anchor == 'w':
+            x = x0 + self.TEXT_PADDING
+        else:
+            x = (x0 + x1) // 2
+        return x0, y0, x1, y1, x, (y0 + y1) // 2
+
+    def _place_cell(self, items, key):
+        rect, text = items
+        x0, y0, x1, y1, x, y = self._get_geometry(key)
+        __, __, title, fgColor, bgColor, anchor, __ = self._get_cell(key)
+        self._canvas.coords(rect, x0, y0, x1, y1)
+        self._canvas.itemconfigure(rect, fill=bgColor)
+        self._canvas.coords(text, x, y)
+        self._canvas.itemconfigure(
+            text,
+            text=title,
+            fill=fgColor,
+            anchor=anchor,
+        )
@@ -0,0 +1,114 @@
+"""Provide a class for persisting the matrix view state per project.
+
+Copyright (c) Peter Triesberger
+For further information see https://github.com/peter88213/nv_matrix
+License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
+"""
+import hashlib
+import json
+
+from nvlib.novx_globals import CH_ROOT
+from nvlib.novx_globals import CR_ROOT
+from nvlib.novx_globals import IT_ROOT
+from nvlib.novx_globals import LC_ROOT
+from nvlib.novx_globals import PL_ROOT
+
+
+class ViewStates:
+    """View states of the matrix, one per project, cached in a JSON file.
+
+    A view state is a dictionary with the scroll position, the filter
+    settings, and the measured layout, to be restored on reopening.
+    Each state is stored under the project file path, together with
+    a fingerprint of the novel structure. If the structure has
+    changed since, the state is discarded.
+    Only the states of the most recently closed projects are kept.
+
+    The file is a cache: If it cannot be read or written,
+    the views are opened without a state.
+    """
+    MAX_PROJECTS = 20
+
+    def __init__(self, filePath):
+        """Set up the cache; the file is read on first access.
+
+        Positional arguments:
+            filePath: str -- Path of the JSON file.
+        """
+        self._filePath = filePath
+
+        # {project file path: {'fingerprint': str, 'state': dict}}
+        self._entries = None
+
+    def get(self, projectPath, fingerprint):
+        """Return the project's view state, or None.
+
+        Positional arguments:
+            projectPath: str -- Path of the project file.
+            fingerprint: str -- Fingerprint of the novel structure.
+
+        None is returned, if there is no state with the fingerprint.
+        """
+        entry = self._get_entries().get(projectPath, None)
+        if entry is None or entry.get('fingerprint', None) != fingerprint:
+            return None
+
+        return entry.get('state', None)
+
+    def save(self):
+        """Write the view states to the file."""
+        if self._entries is None:
+            return
+
+        try:
+            with open(self._filePath, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f)
+        except OSError:
+            pass
+
+    def set(self, projectPath, fingerprint, state):
+        """Store a project's view state, replacing an older one.
+
+        Positional arguments:
+            projectPath: str -- Path of the project file.
+            fingerprint: str -- Fingerprint of the novel structure.
+            state: dict -- View state; must be serializable as JSON.
+        """
+        entries = self._get_entries()
+
+        # Keep the entries in the order of use.
+        entries.pop(projectPath, None)
+        entries[projectPath] = dict(fingerprint=fingerprint, state=state)
+        while len(entries) > self.MAX_PROJECTS:
+            del entries[next(iter(entries))]
+
+    def _get_entries(self):
+        # Return the entries, reading the file on first access.
+        if self._entries is None:
+            try:
+                with open(self._filePath, 'r', encoding='utf-8') as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+            if not isinstance(self._entries, dict):
+                self._entries = {}
+        return self._entries
+
+    @staticmethod
+    def get_fingerprint(novel):
+        """Return a string identifying the novel's structure.
+
+        The fingerprint changes when chapters, sections, or elements
+        are added, deleted, moved, or when a section's type changes.
+        """
+        structure = []
+        for chId in novel.tree.get_children(CH_ROOT):
+            structure.append(chId)
+            for scId in novel.tree.get_children(chId):
+                structure.append(f'{scId}:{novel.sections[scId].scType}')
+        for root in (PL_ROOT, CR_ROOT, LC_ROOT, IT_ROOT):
+            structure.append(root)
+            structure.extend(novel.tree.get_children(root))
+        return hashlib.sha1(
+            '\n'.join(structure).encode('utf-8')
+        ).hexdigest()
@@ -12,10 +12,23 @@ The frame is divided into four sections, each containing one "public" frame:
 - rowTitles and display are simultaneously vertically scrollable.
 - columnTitles and display are simultaneously horizontally scrollable.
 
+Virtual mode
+
+- rowTitles, columnTitles, and display are canvases instead of frames.
+- The caller draws on them, and sets the scrollable area's size.
+- The frame generates a <<ViewChanged>> event when the visible 
+  area changes, so the caller can draw only what is visible.
+
 Mouse wheel
 
 - Use the mouse wheel for vertical scrolling.
 - Use the mouse wheel with the `Shift` key pressed for horizontal scrolling.    
+- A burst of wheel events is merged into one scroll step.
+
+Event coalescing
+
+- Geometry updates on <Configure> events, and wheel scrolling,
+  are deferred until Tk is idle, and done at most once per idle cycle.
 
 
 Based on the VerticalScrolledFrame example class shown and discussed here:
@@ -36,6 +49,8 @@ from tkinter import ttk
 
 import tkinter as tk
 
+SYSTEM = platform.system()
+
 
 class TableFrame(ttk.Frame):
     """A tkinter framew for a scrollable table. 
@@ -46,17 +61,38 @@ class TableFrame(ttk.Frame):
                         of column titles. 
         display -- ttk.Frame for columns and rows to be displayed 
                    and scrolled in both directions.        
+        In virtual mode, rowTitles, columnTitles, and display 
+        are tk.Canvas instances.
     """
 
-    def __init__(self, parent, *args, **kw):
+    def __init__(self, parent, *args, virtual=False, **kw):
+        """Set up the scrollable table areas.
 
+        Optional arguments:
+            virtual: Boolean -- If True, provide the canvases for drawing 
+                                instead of frames.
+        """
         ttk.Frame.__init__(self, parent, *args, **kw)
+        self._virtual = virtual
+
+        # Callbacks to be called when idle, each only once.
+        self._idleCallbacks = {}
+        self._idleJob = None
+
+        # Wheel scrolling units not yet applied: [x, y].
+        self._wheelUnits = [0, 0]
+
+        # The display's visible fractions, as reported by Tk.
+        self._xFractions = (0.0, 1.0)
+        self._yFractions = (0.0, 1.0)
 
         # Scrollbars.
         scrollY = ttk.Scrollbar(self, orient='vertical', command=self.yview)
         scrollY.pack(fill='y', side='right', expand=False)
         scrollX = ttk.Scrollbar(self, orient='horizontal', command=self.xview)
         scrollX.pack(fill='x', side='bottom', expand=False)
+        self._scrollX = scrollX
+        self._scrollY = scrollY
 
         # Left column frame.
         leftColFrame = ttk.Frame(self)
@@ -79,35 +115,24 @@ class TableFrame(ttk.Frame):
         self._rowTitlesCanvas.xview_moveto(0)
         self._rowTitlesCanvas.yview_moveto(0)
 
-        # Create a frame inside the row titles canvas
-        # which will be scrolled with it.
-        self.rowTitles = ttk.Frame(self._rowTitlesCanvas)
-        self._rowTitlesCanvas.create_window(
-            0,
-            0,
-            window=self.rowTitles,
-            anchor='nw',
-            tags='self.rowTitles',
-        )
-
-        def _configure_rowTitles(event):
-            # Update the scrollbars to match the size of the display frame.
-            size = (
-                self.rowTitles.winfo_reqwidth(),
-                self.rowTitles.winfo_reqheight()
+        if virtual:
+            self.rowTitles = self._rowTitlesCanvas
+        else:
+            # Create a frame inside the row titles canvas
+            # which will be scrolled with it.
+            self.rowTitles = ttk.Frame(self._rowTitlesCanvas)
+            self._rowTitlesCanvas.create_window(
+                0,
+                0,
+                window=self.rowTitles,
+                anchor='nw',
+                tags='self.rowTitles',
             )
-            self._rowTitlesCanvas.config(scrollregion="0 0 %s %s" % size)
-
-            # Update the display Canvas's width to fit the inner frame.
-            if (
-                self.rowTitles.winfo_reqwidth()
-                != self._rowTitlesCanvas.winfo_width()
-            ):
-                self._rowTitlesCanvas.config(
-                    width=self.rowTitles.winfo_reqwidth()
-                )
 
-        self.rowTitles.bind('<Configure>', _configure_rowTitles)
+            self.rowTitles.bind(
+                '<Configure>',
+                lambda event: self._call_when_idle(self._configure_rowTitles),
+            )
 
         # Right column frame.
         rightColFrame = ttk.Frame(self)
@@ -126,43 +151,26 @@ class TableFrame(ttk.Frame):
         self._columnTitlesCanvas.xview_moveto(0)
         self._columnTitlesCanvas.yview_moveto(0)
 
-        # Create a frame inside the column titles canvas
-        # which will be scrolled with it.
-        self.columnTitles = ttk.Frame(self._columnTitlesCanvas)
-        self._columnTitlesCanvas.create_window(
-            0,
-            0,
-            window=self.columnTitles,
-            anchor='nw',
-            tags='self.columnTitles',
-        )
+        if virtual:
+            self.columnTitles = self._columnTitlesCanvas
+        else:
+            # Create a frame inside the column titles canvas
+            # which will be scrolled with it.
+            self.columnTitles = ttk.Frame(self._columnTitlesCanvas)
+            self._columnTitlesCanvas.create_window(
+                0,
+                0,
+                window=self.columnTitles,
+                anchor='nw',
+                tags='self.columnTitles',
+            )
 
-        def _configure_columnTitles(event):
-            # Update the scrollbars to match the size of the display frame.
-            size = (
-                self.columnTitles.winfo_reqwidth(),
-                self.columnTitles.winfo_reqheight()
+            self.columnTitles.bind(
+                '<Configure>',
+                lambda event: self._call_when_idle(
+                    self._configure_columnTitles
+                ),
             )
-            self._columnTitlesCanvas.config(scrollregion="0 0 %s %s" % size)
-
-            # Update the display Canvas's width and height
-            # to fit the inner frame.
-            if (
-                self.columnTitles.winfo_reqwidth()
-                != self._columnTitlesCanvas.winfo_width()
-            ):
-                self._columnTitlesCanvas.config(
-                    width=self.columnTitles.winfo_reqwidth()
-                )
-            if (
-                self.columnTitles.winfo_reqheight()
-                != self._columnTitlesCanvas.winfo_height()
-            ):
-                self._columnTitlesCanvas.config(
-                    height=self.columnTitles.winfo_reqheight()
-                )
-
-        self.columnTitles.bind('<Configure>', _configure_columnTitles)
 
         #--- Vertically and horizontally scrollable display.
         displayFrame = ttk.Frame(rightColFrame)
@@ -172,38 +180,34 @@ class TableFrame(ttk.Frame):
             bd=0,
             highlightthickness=0,
         )
-        self._displayCanvas.configure(xscrollcommand=scrollX.set)
-        self._displayCanvas.configure(yscrollcommand=scrollY.set)
+        self._displayCanvas.configure(xscrollcommand=self._set_scroll_x)
+        self._displayCanvas.configure(yscrollcommand=self._set_scroll_y)
         self._displayCanvas.pack(side='left', fill='both', expand=True)
         self._displayCanvas.xview_moveto(0)
         self._displayCanvas.yview_moveto(0)
 
-        # Create a frame inside the display canvas
-        # which will be scrolled with it.
-        self.display = ttk.Frame(self._displayCanvas)
-        self._displayCanvas.create_window(
-            0,
-            0,
-            window=self.display,
-            anchor='nw',
-            tags='self.display',
-        )
+        if virtual:
+            self.display = self._displayCanvas
+            self.display.bind(
+                '<Configure>',
+                lambda event: self._call_when_idle(self._on_view_change),
+            )
+        else:
+            # Create a frame inside the display canvas
+            # which will be scrolled with it.
+            self.display = ttk.Frame(self._displayCanvas)
+            self._displayCanvas.create_window(
+                0,
+                0,
+                window=self.display,
+                anchor='nw',
+                tags='self.display',
+            )
 
-        def _configure_display(event):
-            # Update the scrollbars to match the size of the display frame.
-            size = (
-                self.display.winfo_reqwidth(),
-                self.display.winfo_reqheight()
+            self.display.bind(
+                '<Configure>',
+                lambda event: self._call_when_idle(self._configure_display),
             )
-            self._displayCanvas.config(scrollregion="0 0 %s %s" % size)
-            if (
-                self.display.winfo_reqwidth()
-                != self._displayCanvas.winfo_width()
-            ):
-                # Update the display Canvas's width to fit the inner frame.
-                self._displayCanvas.config(width=self.display.winfo_reqwidth())
-
-        self.display.bind('<Configure>', _configure_display)
         self.bind('<Enter>', self._bind_mousewheel)
         self.bind('<Leave>', self._unbind_mousewheel)
         # this will prevent the frame from being scrolled
@@ -213,52 +217,101 @@ class TableFrame(ttk.Frame):
         """Destructor for deleting event bindings."""
         self.display.unbind('<Configure>')
         self._unbind_mousewheel()
+        if self._idleJob is not None:
+            self.after_cancel(self._idleJob)
+            self._idleJob = None
         super().destroy()
 
     def vertical_scroll(self, event):
         """Event handler for vertical scrolling."""
-        if platform.system() == 'Windows':
-            self.yview_scroll(int(-1 * (event.delta / 120)), 'units')
-        elif platform.system() == 'Darwin':
-            self.yview_scroll(int(-1 * event.delta), 'units')
-        else:
-            if event.num == 4:
-                self.yview_scroll(-1, 'units')
-            elif event.num == 5:
-                self.yview_scroll(1, 'units')
+        self._wheelUnits[1] += self._get_wheel_units(event)
+        self._call_when_idle(self._scroll_wheel_units)
 
     def horizontal_scroll(self, event):
         """Event handler for horizontal scrolling."""
-        if platform.system() == 'Windows':
-            self.xview_scroll(int(-1 * (event.delta / 120)), 'units')
-        elif platform.system() == 'Darwin':
-            self.xview_scroll(int(-1 * event.delta), 'units')
-        else:
-            if event.num == 4:
-                self.xview_scroll(-1, 'units')
-            elif event.num == 5:
-                self.xview_scroll(1, 'units')
+        self._wheelUnits[0] += self._get_wheel_units(event)
+        self._call_when_idle(self._scroll_wheel_units)
+
+    def get_viewport(self):
+        """Return the visible part of the display as canvas coordinates.
+        
+        Return a tuple x0, y0, x1, y1.
+        """
+        x0 = self._displayCanvas.canvasx(0)
+        y0 = self._displayCanvas.canvasy(0)
+        return (
+            x0,
+            y0,
+            x0 + self._displayCanvas.winfo_width(),
+            y0 + self._displayCanvas.winfo_height(),
+        )
+
+    def scroll_to(self, x, y):
+        """Scroll the display to canvas coordinates in virtual mode.
+
+        Positional arguments:
+            x: float -- Canvas x coordinate of the display's left edge.
+            y: float -- Canvas y coordinate of the display's top edge.
+        """
+        scrollRegion = self._displayCanvas.cget('scrollregion').split()
+        if len(scrollRegion) != 4:
+            return
+
+        width = float(scrollRegion[2])
+        height = float(scrollRegion[3])
+        if width > 0:
+            self.xview('moveto', x / width)
+        if height > 0:
+            self.yview('moveto', y / height)
+
+    def set_extent(self, rowTitlesWidth, columnTitlesHeight, width, height):
+        """Set the sizes of the scrollable areas in virtual mode.
+        
+        Positional arguments:
+            rowTitlesWidth: int -- Width of the row titles in pixels.
+            columnTitlesHeight: int -- Height of the column titles in pixels.
+            width: int -- Width of the display in pixels.
+            height: int -- Height of the display in pixels.
+        """
+        self._rowTitlesCanvas.config(
+            width=rowTitlesWidth,
+            scrollregion="0 0 %s %s" % (rowTitlesWidth, height),
+        )
+        self._columnTitlesCanvas.config(
+            width=width,
+            height=columnTitlesHeight,
+            scrollregion="0 0 %s %s" % (width, columnTitlesHeight),
+        )
+        self._displayCanvas.config(
+            width=width,
+            scrollregion="0 0 %s %s" % (width, height),
+        )
+        self._on_view_change()
 
     def xview(self, *args):
         self._columnTitlesCanvas.xview(*args)
         self._displayCanvas.xview(*args)
+        self._on_view_change()
 
     def xview_scroll(self, *args):
-        if not self._displayCanvas.xview() == (0.0, 1.0):
+        if not self._xFractions == (0.0, 1.0):
             self._columnTitlesCanvas.xview_scroll(*args)
             self._displayCanvas.xview_scroll(*args)
+            self._on_view_change()
 
     def yview(self, *args):
         self._rowTitlesCanvas.yview(*args)
         self._displayCanvas.yview(*args)
+        self._on_view_change()
 
     def yview_scroll(self, *args):
-        if not self._displayCanvas.yview() == (0.0, 1.0):
+        if not self._yFractions == (0.0, 1.0):
             self._rowTitlesCanvas.yview_scroll(*args)
             self._displayCanvas.yview_scroll(*args)
+            self._on_view_change()
 
     def _bind_mousewheel(self, event=None):
-        if platform.system() in ('Linux', 'FreeBSD'):
+        if SYSTEM in ('Linux', 'FreeBSD'):
             # Vertical scrolling
             self._rowTitlesCanvas.bind_all(
                 '<Button-4>',
@@ -315,8 +368,104 @@ class TableFrame(ttk.Frame):
                 self.horizontal_scroll
             )
 
+    def _call_idle_callbacks(self):
+        self._idleJob = None
+        callbacks = self._idleCallbacks
+        self._idleCallbacks = {}
+        for callback in callbacks:
+            callback()
+
+    def _call_when_idle(self, callback):
+        # Call back when Tk is idle; repeated requests are merged.
+        self._idleCallbacks[callback] = None
+        if self._idleJob is None:
+            self._idleJob = self.after_idle(self._call_idle_callbacks)
+
+    def _configure_columnTitles(self):
+        # Update the scrollbars to match the size of the display frame.
+        width = self.columnTitles.winfo_reqwidth()
+        height = self.columnTitles.winfo_reqheight()
+        self._columnTitlesCanvas.config(
+            scrollregion="0 0 %s %s" % (width, height)
+        )
+
+        # Update the display Canvas's width and height
+        # to fit the inner frame.
+        if width != self._columnTitlesCanvas.winfo_width():
+            self._columnTitlesCanvas.config(width=width)
+        if height != self._columnTitlesCanvas.winfo_height():
+            self._columnTitlesCanvas.config(height=height)
+
+    def _configure_display(self):
+        # Update the scrollbars to match the size of the display frame.
+        width = self.display.winfo_reqwidth()
+        height = self.display.winfo_reqheight()
+        self._displayCanvas.config(scrollregion="0 0 %s %s" % (width, height))
+        if width != self._displayCanvas.winfo_width():
+            # Update the display Canvas's width to fit the inner frame.
+            self._displayCanvas.config(width=width)
+
+    def _configure_rowTitles(self):
+        # Update the scrollbars to match the size of the display frame.
+        width = self.rowTitles.winfo_reqwidth()
+        height = self.rowTitles.winfo_reqheight()
+        self._rowTitlesCanvas.config(
+            scrollregion="0 0 %s %s" % (width, height)
+        )
+
+        # Update the display Canvas's width to fit the inner frame.
+        if width != self._rowTitlesCanvas.winfo_width():
+            self._rowTitlesCanvas.config(width=width)
+
+    def _get_wheel_units(self, event):
+        # Return the number of units to scroll for a wheel event.
+        if SYSTEM == 'Windows':
+            return int(-1 * (event.delta / 120))
+
+        if SYSTEM == 'Darwin':
+            return int(-1 * event.delta)
+
+        if event.num == 4:
+            return -1
+
+        if event.num == 5:
+            return 1
+
+        return 0
+
+    def _on_view_change(self, event=None):
+        if self._virtual:
+            self.event_generate('<<ViewChanged>>')
+
+    def _scroll_wheel_units(self):
+        # Scroll by the wheel units accumulated since the last idle cycle.
+        # The view is changed only once.
+        unitsX, unitsY = self._wheelUnits
+        self._wheelUnits = [0, 0]
+        scrolled = False
+        if unitsX and not self._xFractions == (0.0, 1.0):
+            self._columnTitlesCanvas.xview_scroll(unitsX, 'units')
+            self._displayCanvas.xview_scroll(unitsX, 'units')
+            scrolled = True
+        if unitsY and not self._yFractions == (0.0, 1.0):
+            self._rowTitlesCanvas.yview_scroll(unitsY, 'units')
+            self._displayCanvas.yview_scroll(unitsY, 'units')
+            scrolled = True
+        if scrolled:
+            self._on_view_change()
+
+    def _set_scroll_x(self, first, last):
+        # Keep track of the display's horizontal view.
+        self._xFractions = (float(first), float(last))
+        self._scrollX.set(first, last)
+
+    def _set_scroll_y(self, first, last):
+        # Keep track of the display's vertical view.
+        self._yFractions = (float(first), float(last))
+        self._scrollY.set(first, last)
+
     def _unbind_mousewheel(self, event=None):
-        if platform.system() in ('Linux', 'FreeBSD'):
+        if SYSTEM in ('Linux', 'FreeBSD'):
             # Vertical scrolling
             self._rowTitlesCanvas.unbind_all('<Button-4>')
             self._rowTitlesCanvas.unbind_all('<Button-5>')
@@ -0,0 +1,425 @@
+"""Benchmark the nv_matrix relationship table with synthetic novels.
+
+usage: benchmark.py [-h] [--sections N [N ...]] [--chapters N]
+                    [--plot-lines N] [--characters N] [--locations N]
+                    [--items N] [--density D] [--colors SHARE]
+                    [--notes SHARE] [--toggles N] [--seed N]
+                    [--output FILE]
+
+The table is drawn in a Tk window, so a display is required.
+On a headless machine, run the benchmark on a virtual X display, e.g.
+xvfb-run python benchmark.py --sections 100 1000 5000
+
+The results are written as JSON: per novel size, wall time and
+peak Python memory of each operation, and widget and canvas item counts.
+
+Note: Like build.py, this script must be started from the tools
+directory, with the novelibre sources in the same parent directory
+as nv_matrix.
+
+Copyright (c) Peter Triesberger
+For further information see https://github.com/peter88213/nv_matrix
+License: GNU GPLv3 (https://www.gnu.org/licenses/gpl-3.0.en.html)
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, f'{os.getcwd()}/../../novelibre/src')
+sys.path.insert(0, f'{os.getcwd()}/../src')
+from nvlib.model.data.chapter import Chapter
+from nvlib.model.data.character import Character
+from nvlib.model.data.novel import Novel
+from nvlib.model.data.nv_tree import NvTree
+from nvlib.model.data.plot_line import PlotLine
+from nvlib.model.data.plot_point import PlotPoint
+from nvlib.model.data.section import Section
+from nvlib.model.data.world_element import WorldElement
+from nvlib.novx_globals import CHAPTER_PREFIX
+from nvlib.novx_globals import CHARACTER_PREFIX
+from nvlib.novx_globals import CH_ROOT
+from nvlib.novx_globals import CR_ROOT
+from nvlib.novx_globals import ITEM_PREFIX
+from nvlib.novx_globals import IT_ROOT
+from nvlib.novx_globals import LC_ROOT
+from nvlib.novx_globals import LOCATION_PREFIX
+from nvlib.novx_globals import PLOT_LINE_PREFIX
+from nvlib.novx_globals import PLOT_POINT_PREFIX
+from nvlib.novx_globals import PL_ROOT
+from nvlib.novx_globals import SECTION_PREFIX
+from nvmatrix.matrix_service import MatrixService
+from nvmatrix.matrix_view import MatrixView
+from nvmatrix.nvmatrix_globals import prefs
+from nvmatrix.platform.platform_settings import MOUSE
+from nvmatrix.relations_table import RelationsTable
+from nvmatrix.widgets.table_frame import TableFrame
+import tkinter as tk
+
+COLORS = (
+    '#1f77b4',
+    '#ff7f0e',
+    '#2ca02c',
+    '#d62728',
+    '#9467bd',
+    '#8c564b',
+    '#e377c2',
+    '#f7f7f7',
+)
+
+
+class BenchmarkModel:
+    """The part of the novelibre model used by the matrix view."""
+
+    def __init__(self, novel):
+        self.novel = novel
+        self.prjFile = None
+        self.observers = []
+        self._isModified = False
+
+    @property
+    def isModified(self):
+        return self._isModified
+
+    @isModified.setter
+    def isModified(self, setFlag):
+        self._isModified = setFlag
+        for observer in self.observers:
+            observer.refresh()
+
+    def add_observer(self, observer):
+        self.observers.append(observer)
+
+    def delete_observer(self, observer):
+        self.observers.remove(observer)
+
+
+class BenchmarkController:
+    """The part of the novelibre controller used by the matrix view."""
+    isLocked = False
+
+    def open_help(self, page=None):
+        pass
+
+
+def count_widgets(widget):
+    """Return the number of widgets in the tree starting with widget."""
+    count = 1
+    for child in widget.winfo_children():
+        count += count_widgets(child)
+    return count
+
+
+def get_counts(root, tableFrame):
+    """Return a dictionary with the widget and canvas item counts."""
+    return dict(
+        widgets=count_widgets(root),
+        canvasItems=(
+            len(tableFrame.display.find_all())
+            +len(tableFrame.rowTitles.find_all())
+            +len(tableFrame.columnTitles.find_all())
+        ),
+    )
+
+
+def make_novel(
+        sections=100,
+        chapters=10,
+        plotLines=5,
+        characters=20,
+        locations=10,
+        items=10,
+        density=0.2,
+        colors=0.3,
+        notes=0.2,
+        seed=1,
+):
+    """Return a synthetic novelibre Novel.
+
+    Optional arguments:
+        sections: int -- Number of normal sections.
+        chapters: int -- Number of chapters holding the sections.
+        plotLines, characters, locations, items: int -- Element counts.
+        density: float -- Probability of a section-element relation.
+        colors: float -- Share of elements with a color.
+        notes: float -- Share of plot line relations with a note.
+        seed: int -- Seed of the random generator.
+    """
+    rand = random.Random(seed)
+    novel = Novel(title='Benchmark', tree=NvTree())
+
+    def new_element(elementClass, prefix, root, count):
+        for i in range(count):
+            elemId = f'{prefix}{i + 1}'
+            element = elementClass(title=f'{prefix.upper()} {i + 1}')
+            if rand.random() < colors:
+                element.color = rand.choice(COLORS)
+            novel.tree.append(root, elemId)
+            yield elemId, element
+
+    for crId, character in new_element(
+        Character,
+        CHARACTER_PREFIX,
+        CR_ROOT,
+        characters,
+    ):
+        character.fullName = f'Character {crId}'
+        character.isMajor = rand.random() < 0.5
+        novel.characters[crId] = character
+    for lcId, location in new_element(
+        WorldElement,
+        LOCATION_PREFIX,
+        LC_ROOT,
+        locations,
+    ):
+        novel.locations[lcId] = location
+    for itId, item in new_element(
+        WorldElement,
+        ITEM_PREFIX,
+        IT_ROOT,
+        items,
+    ):
+        novel.items[itId] = item
+    for plId, plotLine in new_element(
+        PlotLine,
+        PLOT_LINE_PREFIX,
+        PL_ROOT,
+        plotLines,
+    ):
+        plotLine.shortName = plId
+        plotLine.sections = []
+        novel.plotLines[plId] = plotLine
+
+    chapterCount = max(chapters, 1)
+    for i in range(chapterCount):
+        chId = f'{CHAPTER_PREFIX}{i + 1}'
+        novel.chapters[chId] = Chapter(title=f'Chapter {i + 1}', chType=0)
+        novel.tree.append(CH_ROOT, chId)
+    ppCount = 0
+    for i in range(sections):
+        scId = f'{SECTION_PREFIX}{i + 1}'
+        section = Section(title=f'Section {i + 1}', scType=0)
+        section.characters = [
+            crId for crId in novel.characters if rand.random() < density
+        ]
+        section.locations = [
+            lcId for lcId in novel.locations if rand.random() < density
+        ]
+        section.items = [
+            itId for itId in novel.items if rand.random() < density
+        ]
+        section.scPlotLines = []
+        section.scPlotPoints = {}
+        plotlineNotes = {}
+        for plId, plotLine in novel.plotLines.items():
+            if rand.random() < density:
+                section.scPlotLines.append(plId)
+                plotLine.sections.append(scId)
+                if rand.random() < notes:
+                    plotlineNotes[plId] = ' '.join(
+                        rand.choice(('lorem', 'ipsum', 'dolor', 'sit'))
+                        for __ in range(rand.randint(5, 40))
+                    )
+                if rand.random() < 0.3:
+                    ppCount += 1
+                    ppId = f'{PLOT_POINT_PREFIX}{ppCount}'
+                    plotPoint = PlotPoint(title=f'Point {ppCount}')
+                    plotPoint.sectionAssoc = scId
+                    novel.plotPoints[ppId] = plotPoint
+                    novel.tree.append(plId, ppId)
+                    section.scPlotPoints[ppId] = plId
+        section.plotlineNotes = plotlineNotes
+        novel.sections[scId] = section
+        novel.tree.append(f'{CHAPTER_PREFIX}{i % chapterCount + 1}', scId)
+    return novel
+
+
+def measure(root, function):
+    """Return a dictionary with the wall time of a call.
+
+    The time includes the processing of the pending Tk events.
+    If memory tracing is on, the peak memory allocated during
+    the call is included.
+    """
+    if tracemalloc.is_tracing():
+        startMemory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+    startTime = time.perf_counter()
+    function()
+    root.update()
+    result = dict(seconds=time.perf_counter() - startTime)
+    if tracemalloc.is_tracing():
+        result['peakKiB'] = (
+            tracemalloc.get_traced_memory()[1] - startMemory
+        ) // 1024
+    return result
+
+
+def modify_novel(novel, share, seed):
+    """Change the characters of a share of the sections."""
+    rand = random.Random(seed)
+    crIds = list(novel.characters)
+    for section in novel.sections.values():
+        if rand.random() < share:
+            section.characters = rand.sample(
+                crIds,
+                min(len(crIds), len(section.characters) + 1),
+            )
+
+
+def run(root, config, toggles):
+    """Benchmark the matrix with a novel of the configured size.
+
+    Return a dictionary with the results.
+    """
+    novel = make_novel(**config)
+    window = tk.Toplevel(root)
+    window.geometry(prefs['window_geometry'])
+    tableFrame = TableFrame(window, virtual=True)
+    tableFrame.pack(fill='both', expand=True)
+    root.update()
+    results = dict(config=config, operations={})
+    operations = results['operations']
+    tables = []
+
+    def open_table():
+        # Toggled nodes are written back to the model at once.
+        tables.append(RelationsTable(
+            tableFrame,
+            novel,
+            onToggle=lambda *node: tables[0].get_node(*node),
+        ))
+
+    operations['open'] = measure(root, open_table)
+    relationsTable = tables[0]
+    results['afterOpen'] = get_counts(root, tableFrame)
+    operations['draw_matrix'] = measure(
+        root,
+        lambda: relationsTable.draw_matrix(tableFrame),
+    )
+    operations['set_nodes'] = measure(root, relationsTable.set_nodes)
+    operations['get_nodes'] = measure(root, relationsTable.get_nodes)
+    operations['refresh_unchanged'] = measure(root, relationsTable.refresh)
+    modify_novel(novel, 0.1, config['seed'])
+    operations['refresh_changed'] = measure(root, relationsTable.refresh)
+
+    # Toggle the top left node.
+    samples = []
+
+    def toggle():
+        for __ in range(toggles):
+            startTime = time.perf_counter()
+            tableFrame.display.event_generate(
+                MOUSE.TOGGLE_STATE,
+                x=4,
+                y=4,
+            )
+            root.update()
+            samples.append(time.perf_counter() - startTime)
+
+    if toggles:
+        operations['toggle'] = measure(root, toggle)
+        operations['toggle']['seconds'] /= toggles
+        operations['toggle']['maxSeconds'] = max(samples)
+        operations['toggle']['samples'] = toggles
+    results['afterToggle'] = get_counts(root, tableFrame)
+    window.destroy()
+
+    # The matrix view, refreshed via the model.
+    model = BenchmarkModel(novel)
+    views = []
+
+    def open_view():
+        views.append(MatrixView(model, BenchmarkController()))
+        while views[0]._relationsTable.isBuilding:
+            root.update()
+
+    operations['view_open'] = measure(root, open_view)
+    matrixView = views[0]
+    modify_novel(novel, 0.1, config['seed'] + 1)
+    operations['view_refresh'] = measure(
+        root,
+        lambda: setattr(model, 'isModified', True),
+    )
+    results['view'] = get_counts(root, matrixView.tableFrame)
+    matrixView.on_quit()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the nv_matrix relationship table.'
+    )
+    parser.add_argument('--sections', type=int, nargs='+', default=[100])
+    parser.add_argument('--chapters', type=int, default=10)
+    parser.add_argument('--plot-lines', type=int, default=5)
+    parser.add_argument('--characters', type=int, default=20)
+    parser.add_argument('--locations', type=int, default=10)
+    parser.add_argument('--items', type=int, default=10)
+    parser.add_argument('--density', type=float, default=0.2)
+    parser.add_argument('--colors', type=float, default=0.3)
+    parser.add_argument('--notes', type=float, default=0.2)
+    parser.add_argument('--toggles', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='JSON file; default: stdout')
+    args = parser.parse_args()
+
+    prefs.update(MatrixService.SETTINGS)
+    prefs.update(MatrixService.OPTIONS)
+    prefs['show_locations'] = True
+    root = tk.Tk()
+    root.withdraw()
+    report = dict(
+        python=platform.python_version(),
+        tk=root.tk.call('info', 'patchlevel'),
+        platform=platform.platform(),
+        runs=[],
+    )
+    for sections in args.sections:
+        config = dict(
+            sections=sections,
+            chapters=args.chapters,
+            plotLines=args.plot_lines,
+            characters=args.characters,
+            locations=args.locations,
+            items=args.items,
+            density=args.density,
+            colors=args.colors,
+            notes=args.notes,
+            seed=args.seed,
+        )
+        results = run(root, config, args.toggles)
+
+        # Measure the memory in a separate run, because tracing
+        # slows down the operations.
+        tracemalloc.start()
+        tracedResults = run(root, config, args.toggles)
+        tracemalloc.stop()
+        for operation, measurement in results['operations'].items():
+            measurement['peakKiB'] = (
+                tracedResults['operations'][operation]['peakKiB']
+            )
+        report['runs'].append(results)
+    try:
+        import resource
+        report['maxRssKiB'] = resource.getrusage(
+            resource.RUSAGE_SELF
+        ).ru_maxrss
+    except ImportError:
+        pass
+    root.destroy()
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()